@@ -4,22 +4,281 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
-from src.utils import get_data, load_plant_data
+from io import BytesIO
+from src.export import export_plant, WRITERS
+from src.timeseries_store import stat_to_hourly_frame
+from src.rolling_stats import ensure_rolling_stats, exceedance_alerts
+from src.analytics_stats import (POLLUTANTS, daily_distribution, hourly_pattern, weekly_trend, pollutant_correlations,
+                                 wind_speed_histogram, wind_rose, sector_means)
+from src.utils import load_plant_data, aqi_plotly_colorscale, interpolate_color, get_stat_by_plant_id, get_daily_stat_by_plant_id
+
+pollutants = POLLUTANTS
 
 def format_dateid(dateid):
     return pd.to_datetime(str(dateid), format='%Y%m%d')
 
-def get_stat_by_plant_id(plant_id, start_date, end_date=None, record_hour=None):
-    query = """
-        SELECT * FROM dwh.get_stat_by_plant_id(%s, %s, %s, %s)
-    """
-    params = (
-        int(plant_id), 
-        int(start_date.strftime('%Y%m%d')), 
-        int(end_date.strftime('%Y%m%d')) if end_date else None, 
-        int(record_hour) if record_hour is not None else None
+def show_daily_overview(daily):
+    daily = daily.assign(date=daily['dateid'].apply(format_dateid))
+
+    fig_daily_temp = go.Figure()
+    fig_daily_temp.add_trace(go.Scatter(
+        x=daily['date'],
+        y=daily['temperature_2m'],
+        name='Daily Mean',
+        line=dict(color='#FF6B6B', width=2)
+    ))
+    fig_daily_temp.add_trace(go.Bar(
+        x=daily['date'],
+        y=daily['precipitation'],
+        name='Precipitation (mm)',
+        marker_color='#45B7D1',
+        yaxis='y2'
+    ))
+    fig_daily_temp.update_layout(
+        title='Daily Temperature (°C) and Precipitation',
+        height=400,
+        yaxis2=dict(overlaying='y', side='right', showgrid=False)
+    )
+    st.plotly_chart(fig_daily_temp, use_container_width=True)
+
+    fig_daily_poll = px.line(
+        daily,
+        x='date',
+        y=pollutants,
+        title='Daily Pollutant Means',
+        color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
+        height=400
+    )
+    fig_daily_poll.update_layout(hovermode='x unified')
+    st.plotly_chart(fig_daily_poll, use_container_width=True)
+
+
+def wind_rose_figure(data, title):
+    # Sector x speed-bin counts: the payload does not grow with the number of hours
+    rose = wind_rose(data)
+    fig = go.Figure()
+    for i, speed_bin in enumerate(rose.columns):
+        fig.add_trace(go.Barpolar(
+            r=rose[speed_bin],
+            theta=rose.index,
+            name=f"{speed_bin} km/h",
+            marker_color=interpolate_color(i, 0, len(rose.columns) - 1, '#45B7D1', '#FF6B6B')
+        ))
+    fig.update_layout(title=title, height=500, polar=dict(angularaxis=dict(direction='clockwise', rotation=90)))
+    return fig
+
+def show_weather(data, hourly, rolling):
+    # Temperature trend
+    fig_temp = go.Figure()
+    fig_temp.add_trace(go.Scatter(
+        x=data['date'],
+        y=data['temperature_2m'],
+        name='Temperature',
+        line=dict(color='#FF6B6B', width=2)
+    ))
+    fig_temp.add_trace(go.Scatter(
+        x=data['date'],
+        y=rolling['temperature_2m_mean_24h'].to_numpy(),
+        name='24h Average',
+        line=dict(color='#4ECDC4', width=2, dash='dash')
+    ))
+    fig_temp.update_layout(title='Temperature Trends (°C)', height=400)
+    st.plotly_chart(fig_temp, use_container_width=True)
+
+    # Mean wind speed and temperature per direction sector
+    sectors = sector_means(data)
+    fig_wind = go.Figure(go.Barpolar(
+        r=sectors['wind_speed_100m'],
+        theta=sectors.index,
+        customdata=sectors[['temperature_2m', 'hours']],
+        marker=dict(color=sectors['temperature_2m'], colorscale=['#FF6B6B', '#4ECDC4'],
+                    colorbar=dict(title='°C')),
+        hovertemplate='%{theta}°: %{r:.1f} km/h, %{customdata[0]:.1f} °C over %{customdata[1]} hours<extra></extra>'
+    ))
+    fig_wind.update_layout(title='Wind Pattern Analysis (mean km/h, colored by mean temperature)', height=500,
+                           polar=dict(angularaxis=dict(direction='clockwise', rotation=90)))
+    st.plotly_chart(fig_wind, use_container_width=True)
+
+    # Precipitation
+    fig_precip = px.area(
+        data,
+        x='date',
+        y=['precipitation'],
+        title='Precipitation Components',
+        labels={'value': 'mm', 'variable': 'Type'},
+        color_discrete_sequence=['#45B7D1'],
+        height=400
+    )
+    st.plotly_chart(fig_precip, use_container_width=True)
+
+def show_air_quality(data, hourly, rolling, plant_id):
+    # Alerts are evaluated at the end of the selected range, not the latest hour held in memory
+    alert_hour = hourly.index.max()
+    alerts = exceedance_alerts(plant_id, alert_hour, '24h')
+    for pollutant, hours in alerts.items():
+        st.warning(f"{pollutant}: limit exceeded in {int(hours)} of the 24 hours up to {alert_hour:%Y-%m-%d %H:%M}")
+
+    # Pollutants trend
+    fig_poll = px.line(
+        data,
+        x='date',
+        y=pollutants,
+        title='Pollutant Levels Over Time',
+        color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
+        height=400
+    )
+    fig_poll.update_layout(
+        xaxis=dict(
+            rangeselector=dict(
+                buttons=list([
+                    dict(count=1, label="1d", step="day", stepmode="backward"),
+                    dict(count=7, label="1w", step="day", stepmode="backward"),
+                    dict(count=1, label="1m", step="month", stepmode="backward"),
+                    dict(step="all")
+                ])
+            )
+        ),
+        hovermode='x unified'
+    )
+    st.plotly_chart(fig_poll, use_container_width=True)
+
+    # Rolling 7-day means and exceedance counts
+    fig_rolling = go.Figure()
+    for pollutant, color in zip(pollutants, ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD']):
+        fig_rolling.add_trace(go.Scatter(
+            x=hourly.index,
+            y=rolling[f'{pollutant}_mean_7d'],
+            name=pollutant,
+            line=dict(color=color, width=2)
+        ))
+    fig_rolling.update_layout(title='7-Day Rolling Means', height=400, hovermode='x unified')
+    st.plotly_chart(fig_rolling, use_container_width=True)
+
+    fig_exceed = go.Figure()
+    for pollutant, color in zip(pollutants, ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD']):
+        fig_exceed.add_trace(go.Scatter(
+            x=hourly.index,
+            y=rolling[f'{pollutant}_exceed_30d'],
+            name=pollutant,
+            line=dict(color=color, width=2)
+        ))
+    fig_exceed.update_layout(title='Limit Exceedance Hours (30-Day Window)', height=400, hovermode='x unified')
+    st.plotly_chart(fig_exceed, use_container_width=True)
+
+    # European AQI, colored with the same bands as the map plumes
+    max_aqi = 400
+    fig_aqi = go.Figure(go.Scatter(
+        x=data['date'],
+        y=data['european_aqi'],
+        mode='markers',
+        marker=dict(
+            color=data['european_aqi'],
+            colorscale=aqi_plotly_colorscale(max_aqi),
+            cmin=0,
+            cmax=max_aqi,
+            size=4,
+            colorbar=dict(title='AQI')
+        ),
+        name='European AQI'
+    ))
+    fig_aqi.update_layout(title='European AQI', height=400)
+    st.plotly_chart(fig_aqi, use_container_width=True)
+
+    # Daily distributions
+    distribution = daily_distribution(data, pollutants)
+    fig_box = go.Figure()
+    for pollutant, color in zip(pollutants, ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD']):
+        stats = distribution[pollutant]
+        fig_box.add_trace(go.Box(
+            name=pollutant,
+            q1=[stats['q1']],
+            median=[stats['median']],
+            q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']],
+            upperfence=[stats['upperfence']],
+            mean=[stats['mean']],
+            marker_color=color
+        ))
+    fig_box.update_layout(title='Daily Pollutant Distributions', height=400)
+    st.plotly_chart(fig_box, use_container_width=True)
+
+def show_time_analysis(data):
+    # Hourly patterns
+    hourly_avg = hourly_pattern(data, pollutants)
+    fig_hourly = px.line(
+        hourly_avg,
+        title='Average Daily Patterns',
+        color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
+        height=400
+    )
+    st.plotly_chart(fig_hourly, use_container_width=True)
+
+    # Weekly averages
+    weekly_avg = weekly_trend(data, pollutants)
+    fig_weekly = px.line(
+        weekly_avg,
+        title='Weekly Trends',
+        color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
+        height=400
+    )
+    st.plotly_chart(fig_weekly, use_container_width=True)
+
+def show_wind_analysis(data):
+    # Wind speed distribution
+    bins = wind_speed_histogram(data)
+    fig_wind_dist = go.Figure(go.Bar(
+        x=(bins['left'] + bins['right']) / 2,
+        y=bins['count'],
+        width=bins['right'] - bins['left'],
+        marker_color='#45B7D1',
+        name='Hours'
+    ))
+    fig_wind_dist.update_layout(title='Wind Speed Distribution', xaxis_title='wind_speed_100m (km/h)', yaxis_title='count', height=400)
+    st.plotly_chart(fig_wind_dist, use_container_width=True)
+
+    # Wind direction vs speed
+    st.plotly_chart(wind_rose_figure(data, 'Wind Speed by Direction'), use_container_width=True)
+
+def show_correlations(data):
+    st.header("Pollutant Correlations")
+
+    # Correlation matrix
+    corr = pollutant_correlations(data, pollutants)
+    mask = np.triu(np.ones_like(corr, dtype=bool))
+    fig_corr = px.imshow(
+        np.ma.masked_array(corr, mask),
+        labels=dict(color='Correlation'),
+        title='Pollutant Correlations',
+        color_continuous_scale=['#FF6B6B', '#FFFFFF', '#4ECDC4'],
+        height=400
     )
-    return get_data(query, params)
+    st.plotly_chart(fig_corr, use_container_width=True)
+
+    # Scatter plots for pairwise correlations
+    for i, pol1 in enumerate(pollutants):
+        for j, pol2 in enumerate(pollutants):
+            if i < j:  # Only plot upper triangle
+                fig_scatter = px.scatter(
+                    data,
+                    x=pol1,
+                    y=pol2,
+                    title=f'{pol1} vs {pol2}',
+                    opacity=0.6,
+                    color_discrete_sequence=['#FF6B6B']
+                )
+                st.plotly_chart(fig_scatter, use_container_width=True)
+
+    # Temperature vs pollutants
+    for pollutant in pollutants:
+        fig_temp_corr = px.scatter(
+            data,
+            x='temperature_2m',
+            y=pollutant,
+            title=f'Temperature vs {pollutant}',
+            opacity=0.6,
+            color_discrete_sequence=['#FF6B6B']
+        )
+        st.plotly_chart(fig_temp_corr, use_container_width=True)
 
 st.title("Weather and Air Quality Analysis")
 
@@ -44,180 +303,60 @@ end_date = st.date_input("End Date",
                         max_value=plant_info['weather_max_date'],
                         key='data_end')
 
+# Raw export of the selected range
+with st.expander("Export Raw Data"):
+    export_format = st.radio("Format", sorted(WRITERS), horizontal=True, key='export_format')
+    export_key = (int(plant_info['id']), start_date, end_date, export_format)
+    # A prepared file only matches the filters it was exported with
+    if st.session_state.get('export_file', (export_key,))[0] != export_key:
+        del st.session_state.export_file
+    if st.button("Prepare Export"):
+        with st.spinner("Exporting data..."):
+            buffer = BytesIO()
+            export_plant(plant_info['id'], start_date, end_date, buffer, export_format)
+            _, extension = WRITERS[export_format]
+            st.session_state.export_file = (
+                export_key,
+                buffer.getvalue(),
+                f"plant_{plant_info['id']}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{extension}"
+            )
+    if 'export_file' in st.session_state:
+        _, export_data, export_name = st.session_state.export_file
+        st.download_button("Download", export_data, file_name=export_name)
+
 if st.button("Fetch Data"):
-    with st.spinner("Fetching data..."):
-        data = get_stat_by_plant_id(plant_info['id'], start_date, end_date)
-            
+    st.session_state.analytics_request = (int(plant_info['id']), start_date, end_date)
+
+request = st.session_state.get('analytics_request')
+if request is not None:
+    plant_id, request_start, request_end = request
+    if request != (int(plant_info['id']), start_date, end_date):
+        st.info("Filters changed. Press Fetch Data to refresh the charts.")
+
+    # Daily aggregates come first: a few rows per day, aggregated in the database
+    st.markdown("### Daily Overview")
+    show_daily_overview(get_daily_stat_by_plant_id(plant_id, request_start, request_end))
+
+    # Hourly data and heavy charts are only built for the section that is open
+    sections = ["Weather", "Air Quality", "Time Analysis", "Wind Analysis", "Correlations"]
+    section = st.radio("Section", sections, horizontal=True, key='analytics_section')
+
+    with st.spinner("Loading hourly data..."):
+        data = get_stat_by_plant_id(plant_id, request_start, request_end)
         data['date'] = data['dateid'].apply(format_dateid)
-        
-        pollutants = ['pm10', 'pm2_5', 'nitrogen_dioxide', 'sulphur_dioxide', 'ozone']
-        
-        tabs = st.tabs(["Weather", "Air Quality", "Time Analysis", "Wind Analysis", "Correlations"])
-        
-        with tabs[0]:
-            # Temperature trend
-            fig_temp = go.Figure()
-            fig_temp.add_trace(go.Scatter(
-                x=data['date'],
-                y=data['temperature_2m'],
-                name='Temperature',
-                line=dict(color='#FF6B6B', width=2)
-            ))
-            fig_temp.add_trace(go.Scatter(
-                x=data['date'],
-                y=data['temperature_2m'].rolling(24).mean(),
-                name='24h Average',
-                line=dict(color='#4ECDC4', width=2, dash='dash')
-            ))
-            fig_temp.update_layout(title='Temperature Trends (°C)', height=400)
-            st.plotly_chart(fig_temp, use_container_width=True)
-            
-            # Wind rose
-            fig_wind = px.scatter_polar(
-                data,
-                r='wind_speed_100m',
-                theta='wind_direction_100m',
-                color='temperature_2m',
-                title='Wind Pattern Analysis',
-                color_continuous_scale=['#FF6B6B', '#4ECDC4'],
-                height=500
-            )
-            st.plotly_chart(fig_wind, use_container_width=True)
-            
-            # Precipitation
-            fig_precip = px.area(
-                data,
-                x='date',
-                y=['precipitation'],
-                title='Precipitation Components',
-                labels={'value': 'mm', 'variable': 'Type'},
-                color_discrete_sequence=['#45B7D1'],
-                height=400
-            )
-            st.plotly_chart(fig_precip, use_container_width=True)
-        
-        with tabs[1]:
-            # Pollutants trend
-            fig_poll = px.line(
-                data,
-                x='date',
-                y=pollutants,
-                title='Pollutant Levels Over Time',
-                color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
-                height=400
-            )
-            fig_poll.update_layout(
-                xaxis=dict(
-                    rangeselector=dict(
-                        buttons=list([
-                            dict(count=1, label="1d", step="day", stepmode="backward"),
-                            dict(count=7, label="1w", step="day", stepmode="backward"),
-                            dict(count=1, label="1m", step="month", stepmode="backward"),
-                            dict(step="all")
-                        ])
-                    )
-                ),
-                hovermode='x unified'
-            )
-            st.plotly_chart(fig_poll, use_container_width=True)
-            
-            # Daily distributions
-            daily_agg = data.groupby('date')[pollutants].mean()
-            fig_box = px.box(
-                daily_agg.melt(ignore_index=False).reset_index(),
-                x='variable',
-                y='value',
-                color='variable',
-                title='Daily Pollutant Distributions',
-                color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
-                height=400
-            )
-            st.plotly_chart(fig_box, use_container_width=True)
-        
-        with tabs[2]:
-            # Hourly patterns
-            hourly_avg = data.groupby('record_hour')[pollutants].mean()
-            fig_hourly = px.line(
-                hourly_avg,
-                title='Average Daily Patterns',
-                color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
-                height=400
-            )
-            st.plotly_chart(fig_hourly, use_container_width=True)
-            
-            # Weekly averages
-            weekly_avg = data.groupby(
-                data['date'].dt.isocalendar().week
-            )[pollutants].mean()
-            fig_weekly = px.line(
-                weekly_avg,
-                title='Weekly Trends',
-                color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD'],
-                height=400
-            )
-            st.plotly_chart(fig_weekly, use_container_width=True)
-        
-        with tabs[3]:
-            # Wind speed distribution
-            fig_wind_dist = px.histogram(
-                data,
-                x='wind_speed_100m',
-                nbins=30,
-                title='Wind Speed Distribution',
-                color_discrete_sequence=['#45B7D1'],
-                height=400
-            )
-            st.plotly_chart(fig_wind_dist, use_container_width=True)
-            
-            # Wind direction vs speed
-            fig_wind_dir = px.scatter_polar(
-                data,
-                r='wind_speed_100m',
-                theta='wind_direction_100m',
-                color='wind_speed_100m',
-                title='Wind Speed by Direction',
-                color_continuous_scale=['#45B7D1', '#FF6B6B'],
-                height=500
-            )
-            st.plotly_chart(fig_wind_dir, use_container_width=True)
-        
-        with tabs[4]:
-            st.header("Pollutant Correlations")
-            
-            # Correlation matrix
-            corr = data[pollutants].corr()
-            mask = np.triu(np.ones_like(corr, dtype=bool))
-            fig_corr = px.imshow(
-                np.ma.masked_array(corr, mask),
-                labels=dict(color='Correlation'),
-                title='Pollutant Correlations',
-                color_continuous_scale=['#FF6B6B', '#FFFFFF', '#4ECDC4'],
-                height=400
-            )
-            st.plotly_chart(fig_corr, use_container_width=True)
-            
-            # Scatter plots for pairwise correlations
-            for i, pol1 in enumerate(pollutants):
-                for j, pol2 in enumerate(pollutants):
-                    if i < j:  # Only plot upper triangle
-                        fig_scatter = px.scatter(
-                            data,
-                            x=pol1,
-                            y=pol2,
-                            title=f'{pol1} vs {pol2}',
-                            opacity=0.6,
-                            color_discrete_sequence=['#FF6B6B']
-                        )
-                        st.plotly_chart(fig_scatter, use_container_width=True)
-            
-            # Temperature vs pollutants
-            for pollutant in pollutants:
-                fig_temp_corr = px.scatter(
-                    data,
-                    x='temperature_2m',
-                    y=pollutant,
-                    title=f'Temperature vs {pollutant}',
-                    opacity=0.6,
-                    color_discrete_sequence=['#FF6B6B']
-                )
-                st.plotly_chart(fig_temp_corr, use_container_width=True)
\ No newline at end of file
+
+    if section in ("Weather", "Air Quality"):
+        # Rolling statistics are kept per plant and only extended with unseen hours
+        hourly = stat_to_hourly_frame(data)
+        rolling = ensure_rolling_stats(plant_id, hourly).get(hourly.index.min(), hourly.index.max()).reindex(hourly.index)
+
+    if section == "Weather":
+        show_weather(data, hourly, rolling)
+    elif section == "Air Quality":
+        show_air_quality(data, hourly, rolling, plant_id)
+    elif section == "Time Analysis":
+        show_time_analysis(data)
+    elif section == "Wind Analysis":
+        show_wind_analysis(data)
+    else:
+        show_correlations(data)
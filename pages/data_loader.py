@@ -1,7 +1,7 @@
 # pages/data_loader.py
 import streamlit as st
 import pandas as pd
-from src.update_db import WeatherFetcher, insert_weather_data, insert_air_quality_data
+from src.update_db import WeatherFetcher, insert_weather_data, insert_air_quality_data, insert_combined_data
 from src.config import db_params
 from src.utils import load_plant_data, get_data, fetch_missing_dates, determine_date_range
 import psycopg2
@@ -33,16 +33,19 @@ if pd.isnull(plant_info['weather_max_date']):
 
 
 missing_weather_dates_query = f"SELECT dateid FROM dwh.get_missing_weather_dates({plant_info['id']})"
-missing_weather_dates_df = fetch_missing_dates(missing_weather_dates_query)
+missing_weather_dates_df = fetch_missing_dates(missing_weather_dates_query, plant_info['id'])
 
 missing_airq_dates_query = f"SELECT dateid FROM dwh.get_missing_airq_dates({plant_info['id']})"
-missing_airq_dates_df = fetch_missing_dates(missing_airq_dates_query)
+missing_airq_dates_df = fetch_missing_dates(missing_airq_dates_query, plant_info['id'])
 
 # Determine min and max dates for data
 
 
 min_date_weather, max_date_weather = determine_date_range(missing_weather_dates_df, plant_info['weather_min_date'], plant_info['weather_max_date'])
 min_date_airq, max_date_airq = determine_date_range(missing_airq_dates_df, plant_info['weather_min_date'], plant_info['weather_max_date'])
+# Range over the dates missing for either type, so a gap in one type does not refetch the whole history
+missing_combined_dates_df = pd.concat([missing_weather_dates_df, missing_airq_dates_df])
+min_date_combined, max_date_combined = determine_date_range(missing_combined_dates_df, plant_info['weather_min_date'], plant_info['weather_max_date'])
 
 # Generic function to load data
 def load_data(data_type, start_date, end_date, plant_info, insert_function):
@@ -80,7 +83,7 @@ def load_all_missing_data(data_type, fetch_missing_dates_query, insert_function)
             for _, plant in plant_data.iterrows():
                 # Fetch missing dates
                 missing_dates_query = fetch_missing_dates_query.format(plant['id'])
-                missing_dates_df = fetch_missing_dates(missing_dates_query)
+                missing_dates_df = fetch_missing_dates(missing_dates_query, plant['id'])
                 if missing_dates_df.empty:
                     st.write(f"No missing {data_type} dates for {plant['plant_name']}. Skipping...")
                     continue
@@ -108,8 +111,65 @@ def load_all_missing_data(data_type, fetch_missing_dates_query, insert_function)
         except Exception as e:
             st.error(f"Error loading all missing {data_type} data for all power plants: {str(e)}")
 
+# Fetch weather and air quality together and write both in one transaction
+def load_combined_data(start_date, end_date, plant_info):
+    with st.spinner("Fetching and loading weather and air quality data..."):
+        try:
+            fetcher = WeatherFetcher()
+            data_df = fetcher.fetch_combined(
+                plant_info['latitude'],
+                plant_info['longitude'],
+                start_date.strftime('%Y-%m-%d'),
+                end_date.strftime('%Y-%m-%d')
+            )
+            st.write("Combined Data:", data_df.head())
+
+            conn = psycopg2.connect(**db_params)
+            try:
+                insert_combined_data(conn, data_df, plant_info['id'])
+            finally:
+                conn.close()
+
+            st.success(f"Successfully loaded weather and air quality data for {selected_plant_name}")
+
+        except Exception as e:
+            st.error(f"Error loading combined data: {str(e)}")
+
+def load_all_missing_combined_data():
+    with st.spinner("Fetching and loading all missing weather and air quality data for all power plants..."):
+        try:
+            fetcher = WeatherFetcher()
+            conn = psycopg2.connect(**db_params)
+
+            for _, plant in plant_data.iterrows():
+                missing_dates_df = pd.concat([
+                    fetch_missing_dates(f"SELECT dateid FROM dwh.get_missing_weather_dates({plant['id']})", plant['id']),
+                    fetch_missing_dates(f"SELECT dateid FROM dwh.get_missing_airq_dates({plant['id']})", plant['id'])
+                ])
+                if missing_dates_df.empty:
+                    st.write(f"No missing dates for {plant['plant_name']}. Skipping...")
+                    continue
+
+                min_date, max_date = determine_date_range(missing_dates_df, pd.to_datetime('20200101', format='%Y%m%d'), datetime.now())
+
+                data_df = fetcher.fetch_combined(
+                    plant['latitude'],
+                    plant['longitude'],
+                    min_date.strftime('%Y-%m-%d'),
+                    max_date.strftime('%Y-%m-%d')
+                )
+                st.write(f"Combined Data for {plant['plant_name']}:", data_df.head())
+
+                insert_combined_data(conn, data_df, plant['id'])
+
+            conn.close()
+            st.success("Successfully loaded all missing weather and air quality data for all power plants")
+
+        except Exception as e:
+            st.error(f"Error loading all missing combined data for all power plants: {str(e)}")
+
 # Create tabs for weather and air quality data loading
-tabs = st.tabs(["Weather Data", "Air Quality Data"])
+tabs = st.tabs(["Weather Data", "Air Quality Data", "Weather + Air Quality"])
 
 with tabs[0]:
     st.subheader("Load Weather Data")
@@ -147,4 +207,26 @@ with tabs[1]:
         load_data('air_quality', min_date_airq, max_date_airq, plant_info, insert_air_quality_data)
     
     if st.button("Load All Missing Air Quality Data for All Power Plants"):
-        load_all_missing_data('air_quality', "SELECT dateid FROM dwh.get_missing_airq_dates({})", insert_air_quality_data)
\ No newline at end of file
+        load_all_missing_data('air_quality', "SELECT dateid FROM dwh.get_missing_airq_dates({})", insert_air_quality_data)
+
+with tabs[2]:
+    st.subheader("Load Weather and Air Quality Data Together")
+
+    # Date range selection
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date_combined = st.date_input("Start Date", min_date_combined, min_value=min_date_combined, max_value=max_date_combined, key='start_date_combined')
+    with col2:
+        end_date_combined = st.date_input("End Date", max_date_combined, min_value=min_date_combined, max_value=max_date_combined, key='end_date_combined')
+
+    if st.button("Load Weather and Air Quality Data"):
+        load_combined_data(start_date_combined, end_date_combined, plant_info)
+
+    if st.button("Load All Missing Data"):
+        if missing_combined_dates_df.empty:
+            st.info(f"No missing dates for {selected_plant_name}.")
+        else:
+            load_combined_data(min_date_combined, max_date_combined, plant_info)
+
+    if st.button("Load All Missing Data for All Power Plants"):
+        load_all_missing_combined_data()
\ No newline at end of file
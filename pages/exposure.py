@@ -0,0 +1,56 @@
+# pages/exposure.py
+import time
+import streamlit as st
+import plotly.express as px
+from src.utils import load_plant_data
+from src.exposure import exposure_for_plant
+
+st.title("Population Exposure")
+
+# Load plant data
+plant_data = load_plant_data()
+
+# Filters
+st.markdown("### Exposure Filters")
+plant_names = plant_data['plant_name'].tolist()
+selected_plant = st.selectbox("Select Power Plant", plant_names, key='exposure_plant')
+plant_info = plant_data[plant_data['plant_name'] == selected_plant].iloc[0]
+
+col1, col2 = st.columns(2)
+with col1:
+    start_date = st.date_input("Start Date",
+                               plant_info['weather_min_date'],
+                               min_value=plant_info['weather_min_date'],
+                               max_value=plant_info['weather_max_date'],
+                               key='exposure_start')
+with col2:
+    end_date = st.date_input("End Date",
+                             plant_info['weather_max_date'],
+                             min_value=plant_info['weather_min_date'],
+                             max_value=plant_info['weather_max_date'],
+                             key='exposure_end')
+
+if st.button("Compute Exposure"):
+    with st.spinner("Computing plume exposure..."):
+        started = time.perf_counter()
+        exposure = exposure_for_plant(plant_info['id'], start_date, end_date)
+        elapsed = time.perf_counter() - started
+
+    st.write(f"{exposure.attrs['hours_with_plume']} of {exposure.attrs['hours_total']} hours with a plume, computed in {elapsed:.1f} s")
+
+    if exposure.empty:
+        st.warning("No cities are linked to this power plant.")
+    else:
+        fig_exposure = px.bar(
+            exposure,
+            x='city',
+            y='aqi_hours',
+            hover_data=['exposed_hours', 'mean_aqi', 'peak_aqi'],
+            title='Cumulative AQI-hours by City',
+            color_discrete_sequence=['#FF6B6B'],
+            height=400
+        )
+        st.plotly_chart(fig_exposure, use_container_width=True)
+        st.caption("Each plume hour adds the plant's European AQI, reduced by 35% per arc outward, to the cities it covers.")
+
+        st.dataframe(exposure, use_container_width=True)
@@ -2,30 +2,273 @@ import streamlit as st
 import folium
 from streamlit_folium import folium_static
 import time
-from src.utils import get_data, calculate_gaussian_plume, add_gaussian_plume_to_map
+from src.utils import get_cached_data, calculate_gaussian_plume, add_gaussian_plume_to_map, get_fleet_stat, load_plant_cities, get_stat_by_plant_id
+from src.plume import gaussian_plume_arcs, plume_city_hits, plumes_to_geojson, plume_concentration_grid, concentration_to_rgba
+from src.timeseries_store import HourlyStore
+from src.scenarios import scenario_grid, evaluate_scenarios, worst_cases
+from src.cache import query_cache
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-@st.cache_data
 def load_data(plant_info, selected_date):
     query = f"""
         SELECT * FROM dwh.get_stat_by_plant_id({plant_info['id']}, {selected_date.strftime('%Y%m%d')})
     """
-    data = get_data(query)
+    data = get_cached_data(query, plant_id=plant_info['id'])
     return data
 
-@st.cache_data
+@st.cache_resource
+def get_store():
+    return HourlyStore()
+
+def lookup_hour(plant_info, selected_date, hour):
+    """Wind and AQI for one plant-hour: O(1) read from the hourly store, SQL as a fallback."""
+    timestamp = pd.Timestamp(selected_date) + pd.Timedelta(hours=hour)
+    values = get_store().read_hour(plant_info['id'], timestamp,
+                                   ['wind_speed_100m', 'wind_direction_100m', 'european_aqi'])
+    if not any(pd.isna(value) for value in values.values()):
+        values['latitude'] = plant_info['latitude']
+        values['longitude'] = plant_info['longitude']
+        return values
+
+    data = load_data(plant_info, selected_date)
+    df = data[data['record_hour'] == hour]
+    if df.empty:
+        return None
+    return df.iloc[0][['latitude', 'longitude', 'wind_speed_100m', 'wind_direction_100m', 'european_aqi']].to_dict()
+
 def load_plant_data():
     query = "SELECT * FROM dwh.v_plant_dates"
-    data = get_data(query)
+    data = get_cached_data(query)
     return data
 
+def load_fleet_data(selected_date, record_hour):
+    return get_fleet_stat(selected_date, record_hour)
+
+def load_cities():
+    return load_plant_cities()
+
+def show_fleet_overview(plant_data):
+    st.markdown("### Fleet Filters")
+
+    min_dates = pd.to_datetime(plant_data['air_min_date'].dropna().astype(int).astype(str), format='%Y%m%d')
+    max_dates = pd.to_datetime(plant_data['air_max_date'].dropna().astype(int).astype(str), format='%Y%m%d')
+    min_date = min_dates.min() if not min_dates.empty else pd.to_datetime('20200101', format='%Y%m%d')
+    max_date = max_dates.max() if not max_dates.empty else datetime.now()
+
+    selected_date = st.date_input("Select Date", value=max_date, min_value=min_date, max_value=max_date, key='fleet_date')
+    selected_hour = st.slider("Select Hour", 0, 23, 0, key='fleet_hour')
+
+    data = load_fleet_data(selected_date, selected_hour)
+    data = data.dropna(subset=['latitude', 'longitude'])
+    if data.empty:
+        st.warning("No data available for selected date and hour")
+        return
+
+    wind_speed = data['wind_speed_100m'].fillna(0).astype(float)
+    wind_direction = data['wind_direction_100m'].fillna(0).astype(float)
+    aqi = data['european_aqi'].fillna(0).astype(float)
+    active = (wind_speed > 0).to_numpy()
+
+    m = folium.Map(location=[data['latitude'].mean(), data['longitude'].mean()], zoom_start=7)
+
+    # All plumes in one batch and one GeoJSON layer
+    plumes = data[active]
+    if not plumes.empty:
+        polygons, arc_aqi = gaussian_plume_arcs(
+            plumes['latitude'].astype(float), plumes['longitude'].astype(float),
+            wind_speed[active], wind_direction[active], aqi=aqi[active]
+        )
+        cities = load_cities()
+        plant_cities = [cities[cities['plant_id'] == plant_id] for plant_id in plumes['plant_id']]
+        city_hits = plume_city_hits(polygons, plant_cities)
+        folium.GeoJson(
+            plumes_to_geojson(polygons, arc_aqi, plumes['plant_name'].tolist(), city_hits),
+            name="Plumes",
+            style_function=lambda feature: {
+                'color': feature['properties']['color'],
+                'fillColor': feature['properties']['color'],
+                'weight': 1,
+                'fillOpacity': 0.1,
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['plant', 'aqi', 'cities'], aliases=['Plant', 'AQI', 'Cities']),
+        ).add_to(m)
+
+    # Plant markers
+    markers = folium.FeatureGroup(name="Power Plants")
+    for row, speed, direction in zip(data.itertuples(), wind_speed, wind_direction):
+        folium.CircleMarker(
+            location=[float(row.latitude), float(row.longitude)],
+            radius=5,
+            color='blue',
+            fill=True,
+            popup=f"Power Plant: {row.plant_name}<br>Wind Speed: {speed:.1f} km/h<br>Wind Direction: {direction:.0f}°",
+        ).add_to(markers)
+    markers.add_to(m)
+
+    st.write(f"{int(active.sum())} of {len(data)} plants with non-zero wind")
+    folium_static(m, width=1000, height=600)
+
+    if not plumes.empty:
+        affected = pd.DataFrame([
+            {'plant': plant, 'city': city, 'aqi': float(arc_aqi[i, arc])}
+            for i, plant in enumerate(plumes['plant_name'])
+            for arc, names in enumerate(city_hits[i])
+            for city in names
+        ])
+        if not affected.empty:
+            st.markdown("### Affected Cities")
+            st.dataframe(affected.groupby(['plant', 'city'], as_index=False)['aqi'].max().sort_values('aqi', ascending=False))
+
+@st.cache_data(max_entries=32)
+def load_concentration_grid(plant_id, lat, lon, start_date, end_date, extent_m, size, data_version):
+    # Zero-copy slices of the hourly store when it covers the range, SQL otherwise
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    store = get_store()
+    wind_speed, wind_direction, aqi = (store.read_range(plant_id, variable, start, end)
+                                       for variable in ('wind_speed_100m', 'wind_direction_100m', 'european_aqi'))
+    if not (np.isfinite(wind_speed).all() and np.isfinite(wind_direction).all() and np.isfinite(aqi).all()):
+        data = get_stat_by_plant_id(plant_id, start_date, end_date)
+        wind_speed = data['wind_speed_100m'].astype(float).fillna(0)
+        wind_direction = data['wind_direction_100m'].astype(float).fillna(0)
+        aqi = data['european_aqi'].astype(float).fillna(0)
+
+    total, bounds = plume_concentration_grid(
+        lat, lon, wind_speed, wind_direction, aqi,
+        extent_m=extent_m, size=size
+    )
+    return total, bounds, len(wind_speed)
+
+def show_cumulative_heatmap(plant_data):
+    st.markdown("### Heatmap Filters")
+
+    plant_names = plant_data['plant_name'].tolist()
+    selected_plant = st.selectbox("Select Power Plant", plant_names, key='heatmap_plant')
+    plant_info = plant_data[plant_data['plant_name'] == selected_plant].iloc[0]
+
+    min_date = pd.to_datetime(plant_info['air_min_date'], format='%Y%m%d') if pd.notnull(plant_info['air_min_date']) else pd.to_datetime('20200101', format='%Y%m%d')
+    max_date = pd.to_datetime(plant_info['air_max_date'], format='%Y%m%d') if pd.notnull(plant_info['air_max_date']) else datetime.now()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start Date", value=max(min_date, max_date - pd.Timedelta(days=30)), min_value=min_date, max_value=max_date, key='heatmap_start')
+    with col2:
+        end_date = st.date_input("End Date", value=max_date, min_value=min_date, max_value=max_date, key='heatmap_end')
+    extent_km = st.slider("Grid Radius (km)", 5, 50, 20, key='heatmap_extent')
+
+    lat, lon = float(plant_info['latitude']), float(plant_info['longitude'])
+    with st.spinner("Accumulating plume concentrations..."):
+        total, bounds, hours = load_concentration_grid(plant_info['id'], lat, lon, start_date, end_date, extent_km * 1000, 200,
+                                                       query_cache.data_version(plant_info['id']))
+
+    m = folium.Map(location=[lat, lon], zoom_start=10)
+    folium.raster_layers.ImageOverlay(
+        image=concentration_to_rgba(total, hours),
+        bounds=bounds,
+        name="Cumulative Concentration",
+    ).add_to(m)
+    folium.Marker(
+        location=[lat, lon],
+        popup=f"Power Plant: {selected_plant}",
+        icon=folium.Icon(color='blue', icon='info-sign')
+    ).add_to(m)
+
+    st.write(f"{hours} hours aggregated")
+    folium_static(m, width=1000, height=600)
+
+@st.cache_data(max_entries=16)
+def load_scenarios(plant_id, lat, lon, wind_speed, wind_direction, aqi, stability_classes,
+                   wind_speed_factors, direction_offsets, aqi_multipliers):
+    grid = scenario_grid(stability_classes, wind_speed_factors, direction_offsets, aqi_multipliers)
+    cities = load_cities()
+    return evaluate_scenarios(lat, lon, wind_speed, wind_direction, aqi, grid,
+                              cities=cities[cities['plant_id'] == plant_id])
+
+def show_scenarios(plant_data):
+    st.markdown("### Scenario Filters")
+
+    plant_names = plant_data['plant_name'].tolist()
+    selected_plant = st.selectbox("Select Power Plant", plant_names, key='scenario_plant')
+    plant_info = plant_data[plant_data['plant_name'] == selected_plant].iloc[0]
+
+    min_date = pd.to_datetime(plant_info['air_min_date'], format='%Y%m%d') if pd.notnull(plant_info['air_min_date']) else pd.to_datetime('20200101', format='%Y%m%d')
+    max_date = pd.to_datetime(plant_info['air_max_date'], format='%Y%m%d') if pd.notnull(plant_info['air_max_date']) else datetime.now()
+    selected_date = st.date_input("Select Date", value=max_date, min_value=min_date, max_value=max_date, key='scenario_date')
+    selected_hour = st.slider("Select Hour", 0, 23, 0, key='scenario_hour')
+
+    col1, col2 = st.columns(2)
+    with col1:
+        stability_classes = st.multiselect("Stability Classes", list("ABCDEF"), default=list("ABCDEF"), key='scenario_stability')
+        wind_speed_factors = st.multiselect("Wind Speed Factors", [0.5, 0.8, 1.0, 1.2, 1.5], default=[0.8, 1.0, 1.2], key='scenario_speed')
+    with col2:
+        direction_offsets = st.multiselect("Wind Direction Offsets (°)", [-30, -15, 0, 15, 30], default=[-15, 0, 15], key='scenario_direction')
+        aqi_multipliers = st.multiselect("AQI Multipliers", [1.0, 1.5, 2.0, 3.0], default=[1.0, 2.0], key='scenario_aqi')
+
+    if not (stability_classes and wind_speed_factors and direction_offsets and aqi_multipliers):
+        st.warning("Select at least one value for every scenario parameter.")
+        return
+
+    row = lookup_hour(plant_info, selected_date, selected_hour)
+    if row is None or pd.isna(row['wind_speed_100m']) or row['wind_speed_100m'] == 0:
+        st.warning("No wind data available for selected date and hour")
+        return
+
+    lat, lon = float(row['latitude']), float(row['longitude'])
+    aqi = float(row['european_aqi']) if pd.notna(row['european_aqi']) else 0
+    wind_direction = float(row['wind_direction_100m']) if pd.notna(row['wind_direction_100m']) else 0
+
+    # The whole grid is computed once per plant-hour; switching scenarios only redraws
+    results, polygons, arc_aqi = load_scenarios(
+        plant_info['id'], lat, lon, float(row['wind_speed_100m']), wind_direction, aqi,
+        tuple(stability_classes), tuple(wind_speed_factors), tuple(direction_offsets), tuple(aqi_multipliers)
+    )
+
+    labels = [
+        f"{r.stability_class} | wind x{r.wind_speed_factor} {r.direction_offset:+d}° | AQI x{r.aqi_multiplier}"
+        for r in results.itertuples()
+    ]
+    worst = worst_cases(results, n=len(results))
+    selected = st.selectbox("Scenario", worst.index, format_func=lambda i: labels[i], key='scenario_selected')
+
+    m = folium.Map(location=[lat, lon], zoom_start=11)
+    folium.GeoJson(
+        plumes_to_geojson(polygons[selected:selected + 1], arc_aqi[selected:selected + 1], [labels[selected]]),
+        style_function=lambda feature: {
+            'color': feature['properties']['color'],
+            'fillColor': feature['properties']['color'],
+            'weight': 1,
+            'fillOpacity': 0.1,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['aqi'], aliases=['AQI']),
+    ).add_to(m)
+    folium.Marker(
+        location=[lat, lon],
+        popup=f"Power Plant: {selected_plant}",
+        icon=folium.Icon(color='blue', icon='info-sign')
+    ).add_to(m)
+    folium_static(m, width=1000, height=600)
+
+    st.markdown("### Worst-Case Footprints")
+    st.dataframe(worst.head(10), use_container_width=True)
+
 def show_map_view_page():
     st.title("Map View of Air Quality Data")
 
     # Load plant data
     plant_data = load_plant_data()
 
+    mode = st.radio("Map Mode", ["Single Plant", "Fleet Overview", "Cumulative Heatmap", "Scenarios"], horizontal=True, key='map_mode')
+    if mode == "Fleet Overview":
+        show_fleet_overview(plant_data)
+        return
+    if mode == "Cumulative Heatmap":
+        show_cumulative_heatmap(plant_data)
+        return
+    if mode == "Scenarios":
+        show_scenarios(plant_data)
+        return
+
     # Filters
     st.markdown("### Map Filters")
     
@@ -68,18 +311,15 @@ def show_map_view_page():
     if st.button(animate_button_text):
         st.session_state.animate = not st.session_state.get('animate', False)
 
-    # Load data
-    data = load_data(plant_info, selected_date)
-
     def update_map(hour):
-        df = data[data['record_hour'] == hour]
+        row = lookup_hour(plant_info, selected_date, hour)
 
-        if not df.empty:
-            view_lat = float(df['latitude'].iloc[0])
-            view_lon = float(df['longitude'].iloc[0])
-            wind_speed = df['wind_speed_100m'].iloc[0] if df['wind_speed_100m'].iloc[0] is not None else 0
-            wind_direction = df['wind_direction_100m'].iloc[0] if df['wind_direction_100m'].iloc[0] is not None else 0
-            aqi = df['european_aqi'].iloc[0] if df['european_aqi'].iloc[0] is not None else 0
+        if row is not None:
+            view_lat = float(row['latitude'])
+            view_lon = float(row['longitude'])
+            wind_speed = row['wind_speed_100m'] if pd.notna(row['wind_speed_100m']) else 0
+            wind_direction = row['wind_direction_100m'] if pd.notna(row['wind_direction_100m']) else 0
+            aqi = row['european_aqi'] if pd.notna(row['european_aqi']) else 0
 
             # Skip if wind_speed is zero to avoid division by zero
             if wind_speed == 0:
@@ -92,7 +332,7 @@ def show_map_view_page():
             # Add plant marker
             folium.Marker(
                 location=[view_lat, view_lon],
-                popup=f"Power Plant: {selected_plant}<br>Hour: {hour}<br>Wind Speed: {wind_speed:.1f} m/s<br>Wind Direction: {wind_direction:.0f}°",
+                popup=f"Power Plant: {selected_plant}<br>Hour: {hour}<br>Wind Speed: {wind_speed:.1f} km/h<br>Wind Direction: {wind_direction:.0f}°",
                 icon=folium.Icon(color='blue', icon='info-sign')
             ).add_to(m)
 
@@ -106,10 +346,10 @@ def show_map_view_page():
             # Display wind information and map on the same line
             col1, col2, col3 = st.columns([1,1, 3])
             with col1:
-                inf = f"### Wind Information\n**Wind Speed:** {wind_speed:.1f} m/s\n**Wind Direction:** {wind_direction:.0f}°\n"
+                inf = f"### Wind Information\n**Wind Speed:** {wind_speed:.1f} km/h\n**Wind Direction:** {wind_direction:.0f}°\n"
                 st.markdown(inf)
             with col1:
-                inf = f"### Wind Information\n**Wind Speed:** {wind_speed:.1f} m/s\n**Wind Direction:** {wind_direction:.0f}°\n"
+                inf = f"### Wind Information\n**Wind Speed:** {wind_speed:.1f} km/h\n**Wind Direction:** {wind_direction:.0f}°\n"
                 st.markdown(inf)
             with col2:
                 folium_static(m, width=700, height=500)
@@ -0,0 +1,79 @@
+# src/analytics_stats.py
+import numpy as np
+import pandas as pd
+
+POLLUTANTS = ['pm10', 'pm2_5', 'nitrogen_dioxide', 'sulphur_dioxide', 'ozone']
+
+def daily_distribution(data, variables=POLLUTANTS):
+    """Box-plot statistics of daily means, one column per variable."""
+    daily = data.groupby('dateid')[variables].mean()
+    q1, median, q3 = (daily.quantile(q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    # Whiskers reach the furthest daily mean within 1.5 IQR, as in the Plotly box plot
+    lower = daily.where(daily >= q1 - 1.5 * iqr).min()
+    upper = daily.where(daily <= q3 + 1.5 * iqr).max()
+    return pd.DataFrame({
+        'min': daily.min(), 'lowerfence': lower, 'q1': q1, 'median': median,
+        'q3': q3, 'upperfence': upper, 'max': daily.max(), 'mean': daily.mean(),
+    }).T
+
+def hourly_pattern(data, variables=POLLUTANTS):
+    """Mean by hour of day."""
+    return data.groupby('record_hour')[variables].mean()
+
+def weekly_trend(data, variables=POLLUTANTS):
+    """Mean by ISO week number."""
+    week = pd.to_datetime(data['dateid'].astype(str), format='%Y%m%d').dt.isocalendar().week
+    return data.groupby(week.to_numpy())[variables].mean().rename_axis('week')
+
+def pollutant_correlations(data, variables=POLLUTANTS):
+    return data[variables].astype(float).corr()
+
+def histogram(values, bins=30):
+    """Bin counts of a series, ignoring missing values."""
+    values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'count': counts})
+
+def wind_speed_histogram(data, bins=30):
+    return histogram(data['wind_speed_100m'], bins)
+
+def direction_sector(direction, n_sectors=16):
+    """Sector index of each direction, sectors centered on multiples of 360 / n_sectors."""
+    width = 360 / n_sectors
+    return ((direction + width / 2) % 360 // width).astype(int)
+
+# km/h, the Open-Meteo default unit the data is fetched in
+WIND_SPEED_BINS = [0, 5, 10, 20, 30, 40, 60, np.inf]
+
+def wind_rose(data, n_sectors=16, speed_bins=WIND_SPEED_BINS):
+    """
+    Hour counts per direction sector and speed bin.
+
+    Sectors are centered on multiples of 360 / n_sectors (north first); rows with a
+    missing speed or direction are skipped.
+    """
+    speed = pd.to_numeric(data['wind_speed_100m'], errors='coerce').to_numpy(dtype=float)
+    direction = pd.to_numeric(data['wind_direction_100m'], errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(speed) & np.isfinite(direction)
+    speed, direction = speed[valid], direction[valid]
+
+    sector = direction_sector(direction, n_sectors)
+    width = 360 / n_sectors
+    speed_bin = np.clip(np.digitize(speed, speed_bins[1:-1]), 0, len(speed_bins) - 2)
+    n_bins = len(speed_bins) - 1
+    counts = np.bincount(sector * n_bins + speed_bin, minlength=n_sectors * n_bins).reshape(n_sectors, n_bins)
+
+    labels = [f"{low:g}-{high:g}" if np.isfinite(high) else f"{low:g}+" for low, high in zip(speed_bins[:-1], speed_bins[1:])]
+    return pd.DataFrame(counts, index=pd.Index(np.arange(n_sectors) * width, name='direction'), columns=labels)
+
+def sector_means(data, variables=('wind_speed_100m', 'temperature_2m'), n_sectors=16):
+    """Mean of each variable per wind direction sector, plus the hour count; rows without a direction are skipped."""
+    direction = pd.to_numeric(data['wind_direction_100m'], errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(direction)
+    values = data.loc[valid, list(variables)].apply(pd.to_numeric, errors='coerce')
+    sector = direction_sector(direction[valid], n_sectors)
+    grouped = values.groupby(sector)
+    means = grouped.mean().reindex(range(n_sectors))
+    means['hours'] = grouped.size().reindex(range(n_sectors), fill_value=0)
+    return means.set_axis(pd.Index(np.arange(n_sectors) * 360 / n_sectors, name='direction'))
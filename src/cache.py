@@ -0,0 +1,83 @@
+# src/cache.py
+import threading
+from collections import OrderedDict
+from src.config import cache_config
+
+class QueryCache:
+    """
+    LRU cache of query results keyed by SQL, params and data version.
+
+    Each plant has a version counter that ingestion bumps after it commits, plus a
+    global counter bumped on every commit for queries that span all plants. A bump
+    makes older entries unreachable; they age out through the LRU bounds.
+    Versions live in this process, which is where the Streamlit pages ingest.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._global_version = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def data_version(self, plant_id=None):
+        with self._lock:
+            if plant_id is None:
+                return self._global_version
+            return self._versions.get(int(plant_id), 0)
+
+    def bump_data_version(self, plant_id):
+        with self._lock:
+            self._versions[int(plant_id)] = self._versions.get(int(plant_id), 0) + 1
+            self._global_version += 1
+
+    def get_or_load(self, query, params, plant_id, loader):
+        """Return a copy of the cached DataFrame, running loader() on a miss."""
+        key = (query, tuple(params) if params is not None else None,
+               plant_id, self.data_version(plant_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+            self.misses += 1
+
+        df = loader()
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (df, size)
+                self._bytes += size
+                self._evict()
+        return df.copy()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+query_cache = QueryCache(**cache_config)
@@ -1,3 +1,4 @@
+import os
 
 weather_hourly = ["temperature_2m", "precipitation", "rain", "snowfall",
                       "wind_speed_10m", "wind_speed_100m",
@@ -10,8 +11,9 @@ air_quality_hourly = ["pm10", "pm2_5", "carbon_monoxide", "carbon_dioxide",
                       "european_aqi_ozone", "european_aqi_sulphur_dioxide"]
 
 # config.py
+# TPP_DB_NAME selects another database on the same server, e.g. a scratch copy for load tests
 db_params = {
-    "database": "tpp_analysis",
+    "database": os.environ.get("TPP_DB_NAME", "tpp_analysis"),
     "user": "postgres",
     "password": "postgres", 
     "host": "localhost",
@@ -23,6 +25,9 @@ db_params = {
 # }
 
 
+# Point WeatherFetcher at another host with the same paths, e.g. the local stub (python -m src.stub_server)
+api_base_url_override = os.environ.get("TPP_API_BASE_URL")
+
 api_config = {
     "weather": {
         "base_url": "https://archive-api.open-meteo.com/v1/archive",
@@ -34,3 +39,30 @@ api_config = {
     }
 }
 
+# Memory-mapped hourly time-series store (one .npy per plant and variable)
+store_config = {
+    "path": "data/timeseries",
+    "start_date": "2020-01-01",
+    "chunk_hours": 24 * 366
+}
+
+# Shared query-result cache
+cache_config = {
+    "max_entries": 256,
+    "max_bytes": 512 * 1024 * 1024
+}
+
+# Rolling-window statistics: windows in hours and exceedance thresholds
+rolling_windows = {"24h": 24, "7d": 24 * 7, "30d": 24 * 30}
+
+# Plants whose rolling statistics are kept in memory, least recently used evicted first
+rolling_max_plants = 8
+
+exceedance_thresholds = {
+    "pm10": 50,
+    "pm2_5": 25,
+    "nitrogen_dioxide": 200,
+    "sulphur_dioxide": 350,
+    "ozone": 120,
+    "european_aqi": 100
+}
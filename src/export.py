@@ -0,0 +1,146 @@
+# src/export.py
+import os
+import csv
+import gzip
+import argparse
+import psycopg2
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from src.config import db_params
+
+EXPORT_QUERY = "SELECT * FROM dwh.get_stat_by_plant_id(%s, %s, %s, NULL)"
+
+PG_NUMERIC = 1700  # psycopg2 returns NUMERIC values as Decimal
+
+def stream_stat_batches(conn, plant_id, start_date, end_date, batch_size=50000):
+    """
+    Yield DataFrames of get_stat_by_plant_id rows through a server-side cursor.
+
+    NUMERIC columns are converted to float, and each frame carries the column
+    type codes in attrs['type_codes'] so writers can fix types up front. An empty
+    range yields one empty frame, so writers still produce a file with a header.
+    """
+    with conn.cursor(name=f"export_{int(plant_id)}") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(EXPORT_QUERY, (
+            int(plant_id),
+            int(start_date.strftime('%Y%m%d')),
+            int(end_date.strftime('%Y%m%d'))
+        ))
+        first = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows and not first:
+                break
+            first = False
+            columns = [column[0] for column in cursor.description]
+            df = pd.DataFrame.from_records(rows, columns=columns)
+            for column in cursor.description:
+                if column[1] == PG_NUMERIC:
+                    df[column[0]] = df[column[0]].astype(float)
+            df.attrs['type_codes'] = {column[0]: column[1] for column in cursor.description}
+            yield df
+            if not rows:
+                break
+
+def write_parquet(fileobj, batches):
+    """
+    Write each batch as one Parquet row group.
+
+    Column types come from the database type codes when the batches carry them,
+    so a column that is all NULL in the first batch keeps its real type.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # PostgreSQL type OIDs as reported in cursor.description
+    arrow_types = {
+        16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(),
+        700: pa.float32(), 701: pa.float64(), PG_NUMERIC: pa.float64(),
+        25: pa.string(), 1043: pa.string(), 1082: pa.date32(), 1114: pa.timestamp('us'),
+    }
+
+    writer = None
+    schema = None
+    try:
+        for df in batches:
+            if writer is None:
+                type_codes = df.attrs.get('type_codes', {})
+                fields = []
+                for field in pa.Schema.from_pandas(df, preserve_index=False):
+                    if type_codes.get(field.name) in arrow_types:
+                        field = field.with_type(arrow_types[type_codes[field.name]])
+                    elif pa.types.is_null(field.type):
+                        # Unknown type and all NULL in the first batch: store as float
+                        field = field.with_type(pa.float64())
+                    fields.append(field)
+                schema = pa.schema(fields)
+                writer = pq.ParquetWriter(fileobj, schema, compression='snappy')
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def write_csv_gz(fileobj, batches):
+    """Write batches as one gzip-compressed CSV with a single header."""
+    with gzip.open(fileobj, 'wt', newline='') as f:
+        writer = csv.writer(f)
+        header_written = False
+        for df in batches:
+            if not header_written:
+                writer.writerow(df.columns)
+                header_written = True
+            writer.writerows(df.itertuples(index=False, name=None))
+
+WRITERS = {
+    'parquet': (write_parquet, 'parquet'),
+    'csv': (write_csv_gz, 'csv.gz'),
+}
+
+def export_plant(plant_id, start_date, end_date, fileobj, fmt='parquet', batch_size=50000):
+    """Stream one plant's statistics into fileobj (path or binary file) in the given format."""
+    write, _ = WRITERS[fmt]
+    conn = psycopg2.connect(**db_params)
+    try:
+        write(fileobj, stream_stat_batches(conn, plant_id, start_date, end_date, batch_size))
+    finally:
+        conn.close()
+
+def export_plants(plant_ids, start_date, end_date, out_dir, fmt='parquet', workers=4, batch_size=50000):
+    """Export several plants concurrently, one file per plant. Returns the written paths."""
+    _, extension = WRITERS[fmt]
+    os.makedirs(out_dir, exist_ok=True)
+
+    def export_one(plant_id):
+        path = os.path.join(out_dir, f"plant_{int(plant_id)}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{extension}")
+        export_plant(plant_id, start_date, end_date, path, fmt, batch_size)
+        return path
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(export_one, plant_ids))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export plant statistics to Parquet or gzip CSV")
+    parser.add_argument("--plants", nargs="*", type=int, help="Plant ids (default: all)")
+    parser.add_argument("--start", required=True, help="Start date, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="End date, YYYY-MM-DD")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="parquet")
+    parser.add_argument("--out", default="exports")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    plant_ids = args.plants
+    if not plant_ids:
+        from src.utils import get_data
+        plant_ids = get_data("SELECT id FROM dwh.v_plant_dates")['id'].tolist()
+
+    paths = export_plants(
+        plant_ids,
+        datetime.strptime(args.start, '%Y-%m-%d'),
+        datetime.strptime(args.end, '%Y-%m-%d'),
+        args.out, args.format, args.workers, args.batch_size
+    )
+    for path in paths:
+        print(path)
@@ -0,0 +1,104 @@
+# src/fleet_report.py
+"""
+Fleet-wide analytics rollups in one run.
+
+Plants are partitioned across a process pool; each worker fetches its plants'
+hourly statistics and computes the same tables as the analytics page. All
+results are written to one long-format file (plant, section, key, variable, value):
+
+    python -m src.fleet_report --start 2023-01-01 --end 2023-12-31 --out fleet_report.parquet
+"""
+import os
+import time
+import argparse
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.analytics_stats import (POLLUTANTS, daily_distribution, hourly_pattern, weekly_trend,
+                                 pollutant_correlations, wind_speed_histogram, wind_rose)
+
+REPORT_COLUMNS = ['plant_id', 'plant_name', 'section', 'key', 'variable', 'value']
+
+def _long(table, section):
+    """Stack a key x variable table into section/key/variable/value rows."""
+    table = table.rename_axis(index='key', columns='variable')
+    long = table.stack().rename('value').reset_index()
+    long['key'] = long['key'].astype(str)
+    long.insert(0, 'section', section)
+    return long
+
+def plant_rollups(data):
+    """All analytics-page rollups for one plant's hourly rows, in long format."""
+    histogram = wind_speed_histogram(data)
+    histogram.index = histogram['left'].round(2).astype(str) + '-' + histogram['right'].round(2).astype(str)
+    return pd.concat([
+        _long(daily_distribution(data), 'daily_distribution'),
+        _long(hourly_pattern(data), 'hourly_pattern'),
+        _long(weekly_trend(data), 'weekly_trend'),
+        _long(pollutant_correlations(data), 'correlation'),
+        _long(histogram[['count']].rename(columns={'count': 'wind_speed_100m'}), 'wind_speed_histogram'),
+        _long(wind_rose(data), 'wind_rose'),
+    ], ignore_index=True)
+
+def _report_partition(plants, start_date, end_date):
+    from src.utils import get_stat_by_plant_id
+
+    results = []
+    for plant_id, plant_name in plants:
+        # Each plant is read once, so the shared query cache would only hold memory
+        data = get_stat_by_plant_id(plant_id, start_date, end_date, cached=False)
+        if data.empty:
+            continue
+        numeric = POLLUTANTS + ['wind_speed_100m', 'wind_direction_100m']
+        data[numeric] = data[numeric].astype(float)
+        rollups = plant_rollups(data)
+        rollups.insert(0, 'plant_name', plant_name)
+        rollups.insert(0, 'plant_id', plant_id)
+        results.append(rollups)
+    return pd.concat(results, ignore_index=True) if results else None
+
+def run_fleet_report(start_date, end_date, out, workers=None, plant_ids=None):
+    """Compute rollups for every plant across a process pool and write one output file."""
+    from src.utils import load_plant_data
+
+    plants = load_plant_data()[['id', 'plant_name']]
+    if plant_ids:
+        plants = plants[plants['id'].isin(plant_ids)]
+    plants = [(int(plant_id), plant_name) for plant_id, plant_name in plants.itertuples(index=False)]
+
+    workers = min(workers or os.cpu_count(), max(len(plants), 1))
+    partitions = [plants[i::workers] for i in range(workers)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(_report_partition, partitions,
+                                  [start_date] * workers, [end_date] * workers))
+    parts = [part for part in parts if part is not None]
+    if parts:
+        report = pd.concat(parts, ignore_index=True)
+    else:
+        print(f"No hourly data for any of {len(plants)} plants between {start_date:%Y-%m-%d} and {end_date:%Y-%m-%d}; "
+              f"writing an empty report")
+        report = pd.DataFrame(columns=REPORT_COLUMNS)
+
+    if out.endswith('.parquet'):
+        report.to_parquet(out, index=False)
+    else:
+        report.to_csv(out, index=False)
+    print(f"{len(plants)} plants, {len(report)} rows in {time.perf_counter() - started:.1f} s -> {out}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute analytics rollups for every plant")
+    parser.add_argument("--start", required=True, help="Start date, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="End date, YYYY-MM-DD")
+    parser.add_argument("--out", default="fleet_report.parquet", help=".parquet, .csv or .csv.gz")
+    parser.add_argument("--workers", type=int, help="Processes (default: CPU count)")
+    parser.add_argument("--plants", nargs="*", type=int, help="Plant ids (default: all)")
+    args = parser.parse_args()
+
+    run_fleet_report(
+        datetime.strptime(args.start, '%Y-%m-%d'),
+        datetime.strptime(args.end, '%Y-%m-%d'),
+        args.out, args.workers, args.plants
+    )
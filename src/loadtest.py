@@ -0,0 +1,185 @@
+# src/loadtest.py
+"""
+Concurrent-session load test for the Streamlit pages.
+
+Each simulated user is a thread in this process that drives the pages headlessly
+with Streamlit's AppTest, so sessions share module state (query cache, hourly store
+maps, rolling statistics) the way they do in one Streamlit server. Memory per session
+is the growth in process RSS divided by the number of concurrent sessions. Run it
+against a local seeded database configured in src/config.py, or seed a scratch
+copy of the schema with synthetic data from the Open-Meteo stub first:
+
+    python -m src.loadtest --users 8 --iterations 5
+    TPP_DB_NAME=tpp_loadtest python -m src.loadtest --seed 10 --seed-days 90 --users 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from src.config import db_params
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    'analytics': 'pages/analytics.py',
+    'map_view': 'pages/map_view.py',
+    'data_loader': 'pages/data_loader.py',
+}
+
+# Buttons clicked after the first render; loader buttons are left alone so the test never calls the live API
+PAGE_ACTIONS = {
+    'analytics': ['Fetch Data'],
+    'map_view': [],
+    'data_loader': [],
+}
+
+def rss_mb():
+    """Current resident set size of this process."""
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+def run_user(user_id, pages, iterations, timeout):
+    """Drive the pages for one simulated user; returns latencies and errors."""
+    from streamlit.testing.v1 import AppTest
+
+    latencies = {page: [] for page in pages}
+    errors = {page: 0 for page in pages}
+
+    for _ in range(iterations):
+        for page in pages:
+            started = time.perf_counter()
+            try:
+                at = AppTest.from_file(PAGES[page], default_timeout=timeout).run()
+                for label in PAGE_ACTIONS[page]:
+                    button = next(b for b in at.button if b.label == label)
+                    button.click().run()
+                if at.exception:
+                    errors[page] += 1
+            except Exception:
+                errors[page] += 1
+            latencies[page].append(time.perf_counter() - started)
+
+    return {'user': user_id, 'latencies': latencies, 'errors': errors}
+
+class ConnectionSampler(threading.Thread):
+    """Polls pg_stat_activity for the number of connections to the app database."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = psycopg2.connect(**db_params)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                while not self._stop_event.is_set():
+                    cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = %s",
+                                   (db_params['database'],))
+                    # Exclude the sampler's own connection
+                    self.samples.append(cursor.fetchone()[0] - 1)
+                    self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class MemorySampler(ConnectionSampler):
+    """Polls the RSS of this process."""
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(rss_mb())
+            self._stop_event.wait(self.interval)
+
+def summarize(results, connection_samples, wall_time, baseline_mb, memory_samples):
+    report = {'wall_time_s': wall_time, 'users': len(results), 'pages': {}}
+    for page in results[0]['latencies']:
+        latencies = np.concatenate([r['latencies'][page] for r in results])
+        report['pages'][page] = {
+            'runs': int(len(latencies)),
+            'errors': int(sum(r['errors'][page] for r in results)),
+            'p50_s': float(np.percentile(latencies, 50)),
+            'p90_s': float(np.percentile(latencies, 90)),
+            'p99_s': float(np.percentile(latencies, 99)),
+            'max_s': float(latencies.max()),
+        }
+    growth = np.array(memory_samples or [baseline_mb]) - baseline_mb
+    report['memory_per_session_mb'] = {
+        'mean': float(growth.mean() / len(results)),
+        'max': float(growth.max() / len(results)),
+    }
+    if connection_samples:
+        report['db_connections'] = {'mean': float(np.mean(connection_samples)), 'max': int(max(connection_samples))}
+    return report
+
+def print_report(report):
+    print(f"{report['users']} users, {report['wall_time_s']:.1f} s wall time")
+    print(f"{'page':<12} {'runs':>5} {'errors':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for page, stats in report['pages'].items():
+        print(f"{page:<12} {stats['runs']:>5} {stats['errors']:>6} "
+              f"{stats['p50_s']:>8.2f} {stats['p90_s']:>8.2f} {stats['p99_s']:>8.2f} {stats['max_s']:>8.2f}")
+    memory = report['memory_per_session_mb']
+    print(f"Memory per session: mean {memory['mean']:.1f} MB, max {memory['max']:.1f} MB")
+    if 'db_connections' in report:
+        print(f"DB connections: mean {report['db_connections']['mean']:.1f}, max {report['db_connections']['max']}")
+
+def seed_database(n_plants, days, workers=4):
+    """Fill the configured (scratch) database with stub data for n_plants through insert_combined_data."""
+    from src.stub_server import start_server, run_benchmark
+
+    server = start_server(port=0)
+    try:
+        run_benchmark(f"http://127.0.0.1:{server.server_address[1]}", n_plants, days,
+                      insert_db=db_params['database'], workers=workers)
+    finally:
+        server.shutdown()
+
+def run_load_test(users, iterations, pages=None, timeout=120):
+    pages = pages or list(PAGES)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    baseline_mb = rss_mb()
+    sampler, memory = ConnectionSampler(), MemorySampler(interval=0.2)
+    sampler.start()
+    memory.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            futures = [executor.submit(run_user, user, pages, iterations, timeout) for user in range(users)]
+            results = [future.result() for future in futures]
+    finally:
+        sampler.stop()
+        memory.stop()
+    return summarize(results, sampler.samples, time.perf_counter() - started, baseline_mb, memory.samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit pages with concurrent simulated users")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--pages", nargs="*", choices=sorted(PAGES))
+    parser.add_argument("--timeout", type=float, default=120, help="Per-run timeout in seconds")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--seed", type=int, metavar="N_PLANTS",
+                        help="First insert stub data for N plants into the database (must be a scratch database)")
+    parser.add_argument("--seed-days", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_database(args.seed, args.seed_days)
+
+    report = run_load_test(args.users, args.iterations, args.pages, args.timeout)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
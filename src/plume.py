@@ -0,0 +1,257 @@
+# src/plume.py
+import numpy as np
+from src.utils import aqi_colors_hex, aqi_colors_rgba
+
+LAT_FACTOR = 111320  # meters per degree of latitude
+
+STABILITY_PARAMS = {
+    'A': (0.22, 0.20), 'B': (0.16, 0.12), 'C': (0.11, 0.08),
+    'D': (0.08, 0.06), 'E': (0.06, 0.03), 'F': (0.04, 0.016)
+}
+
+# Arc outline: -180..180 degrees in 5 degree steps, squeezed near the axis
+ARC_ANGLES = np.arange(-180, 181, 5)
+ARC_COEF = np.where(np.abs(ARC_ANGLES) < 100, 0.05, 1.0)
+ARC_ANGLES_RAD = np.radians(ARC_ANGLES * ARC_COEF)
+# Outline of the first arc in units of (distance, width); arc i is this scaled by i + 1
+ARC_X = ARC_COEF * 2 * np.cos(ARC_ANGLES_RAD)
+ARC_Y = 0.5 * np.sin(ARC_ANGLES_RAD)
+ARC_DECAY = 0.65  # AQI ratio between neighbouring arcs
+# Colors are looked up at the scale of the single-plant map, which passes aqi * 5
+# to generate_gaussian_plume_v1 and gets arcs at 15x that; arc values stay on the AQI scale
+PLUME_COLOR_SCALE = 5 * 15
+
+def stability_coefficients(stability_class):
+    """Horizontal dispersion coefficient 'a' for one or many stability classes."""
+    classes = np.asarray(stability_class)
+    lookup = np.vectorize(lambda c: STABILITY_PARAMS.get(c, STABILITY_PARAMS['D'])[0], otypes=[float])
+    return lookup(classes)
+
+def gaussian_plume_arcs(lat, lon, wind_speed, wind_direction, stability_class='D', aqi=100, num_arcs=8):
+    """
+    Vectorized plume arcs for many sources/hours at once.
+
+    NumPy port of the arc geometry used by generate_gaussian_plume_v1, so that
+    batches of plumes can be computed without one SQL round trip each. Width is
+    scaled by the stability class relative to class 'D'.
+
+    Args:
+    - lat, lon, wind_speed, wind_direction, stability_class, aqi: scalars or arrays broadcastable to (N,).
+    - num_arcs (int): Number of nested arcs per plume.
+
+    Returns:
+    - polygons (ndarray): (N, num_arcs, points, 2) array of (lat, lon) vertices, closed at the source.
+    - arc_aqi (ndarray): (N, num_arcs) AQI assigned to each arc, decaying outward from aqi.
+    """
+    lat, lon, wind_speed, wind_direction, a, aqi = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in
+          (lat, lon, wind_speed, wind_direction, stability_coefficients(stability_class), aqi))
+    )
+    wind_rad = np.radians(wind_direction)[:, None, None]
+    cos_w, sin_w = np.cos(wind_rad), np.sin(wind_rad)
+    lon_factor = (LAT_FACTOR * np.cos(np.radians(lat)))[:, None, None]
+
+    # Start 1 km upwind of the stack
+    shift_distance = -1000
+    shifted_lat = lat[:, None, None] + (shift_distance / LAT_FACTOR) * cos_w
+    shifted_lon = lon[:, None, None] + (shift_distance / lon_factor) * sin_w
+
+    arc_index = np.arange(num_arcs)[None, :, None]
+    speed = wind_speed[:, None, None]
+    distance = (arc_index + 1) * speed * 70
+    width = speed * 60 * (1 + arc_index) * (a / STABILITY_PARAMS['D'][0])[:, None, None]
+
+    x = distance * ARC_X
+    y = width * ARC_Y
+
+    arc_lat = shifted_lat + (x / LAT_FACTOR) * cos_w - (y / LAT_FACTOR) * sin_w
+    arc_lon = shifted_lon + (x / lon_factor) * sin_w + (y / lon_factor) * cos_w
+
+    polygons = np.empty((len(lat), num_arcs, len(ARC_ANGLES) + 1, 2))
+    polygons[:, :, :-1, 0] = arc_lat
+    polygons[:, :, :-1, 1] = arc_lon
+    polygons[:, :, -1, 0] = shifted_lat[:, :, 0]
+    polygons[:, :, -1, 1] = shifted_lon[:, :, 0]
+
+    arc_aqi = aqi[:, None] * (ARC_DECAY ** np.arange(num_arcs))[None, :]
+    return polygons, arc_aqi
+
+def points_in_polygons(points, polygons):
+    """
+    Even-odd ray casting of many points against many polygons.
+
+    Args:
+    - points (ndarray): (M, 2) array of (lat, lon).
+    - polygons (ndarray): (..., K, 2) array of closed (lat, lon) rings.
+
+    Returns:
+    - ndarray: (..., M) boolean containment mask.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    py, px = points[:, 0], points[:, 1]
+    y1, x1 = polygons[..., :, 0, None], polygons[..., :, 1, None]
+    y2, x2 = np.roll(y1, -1, axis=-2), np.roll(x1, -1, axis=-2)
+
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+    crossings = straddles & (px < x_cross)
+    return np.count_nonzero(crossings, axis=-2) % 2 == 1
+
+# The outline is star-shaped around its origin with polar angle rising from -pi to pi,
+# so the edge hit by a ray from the origin is found by bisecting the vertex angles
+_ARC_VERTICES = np.stack([ARC_X[:-1], ARC_Y[:-1]], axis=-1)
+_ARC_VERTEX_ANGLES = np.arctan2(_ARC_VERTICES[:, 1], _ARC_VERTICES[:, 0])
+_ARC_VERTEX_ANGLES[0] = -np.pi
+
+def plume_arc_index(points, lat, lon, wind_speed, wind_direction, stability_class='D', num_arcs=8):
+    """
+    Innermost arc of each plume that contains each point, without building polygons.
+
+    Points are rotated into the plume frame of gaussian_plume_arcs and compared with
+    the outline of the first arc, which every other arc scales. Gives the same
+    containment as points_in_polygons on the arcs, in O(plumes x points).
+
+    Args:
+    - points (ndarray): (M, 2) array of (lat, lon).
+    - lat, lon, wind_speed, wind_direction, stability_class: As for gaussian_plume_arcs, broadcastable to (N,).
+
+    Returns:
+    - ndarray: (N, M) arc index, num_arcs where the point lies outside every arc.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    lat, lon, wind_speed, wind_direction, a = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in
+          (lat, lon, wind_speed, wind_direction, stability_coefficients(stability_class)))
+    )
+    wind_rad = np.radians(wind_direction)[:, None]
+    cos_w, sin_w = np.cos(wind_rad), np.sin(wind_rad)
+    lon_factor = (LAT_FACTOR * np.cos(np.radians(lat)))[:, None]
+
+    # Meters north/east of the shifted origin, then along/across the wind in first-arc units
+    north = (points[None, :, 0] - lat[:, None]) * LAT_FACTOR + 1000 * cos_w
+    east = (points[None, :, 1] - lon[:, None]) * lon_factor + 1000 * sin_w
+    speed = wind_speed[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u = (north * cos_w + east * sin_w) / (speed * 70)
+        v = (east * cos_w - north * sin_w) / (speed * 60 * (a / STABILITY_PARAMS['D'][0])[:, None])
+
+    # Scale at which the outline passes through the point: cross(q, e) / cross(p, e) for edge p -> p + e
+    edge = np.searchsorted(_ARC_VERTEX_ANGLES, np.arctan2(v, u), side='right') - 1
+    start = _ARC_VERTICES[edge]
+    end = _ARC_VERTICES[(edge + 1) % len(_ARC_VERTICES)]
+    ex, ey = end[..., 0] - start[..., 0], end[..., 1] - start[..., 1]
+    scale = (u * ey - v * ex) / (start[..., 0] * ey - start[..., 1] * ex)
+
+    index = np.maximum(np.ceil(scale) - 1, 0)
+    return np.where(np.isfinite(index) & (index < num_arcs), index, num_arcs).astype(np.int64)
+
+def plume_city_hits(polygons, cities):
+    """
+    Cities covered by each arc of each plume.
+
+    Args:
+    - polygons (ndarray): Polygons from gaussian_plume_arcs for N plumes.
+    - cities (list of DataFrame): Per plume, the candidate cities with 'loc_name', 'latitude', 'longitude'.
+
+    Returns:
+    - list of list of list of str: City names per plume and arc.
+    """
+    hits = []
+    for plume, plume_cities in zip(polygons, cities):
+        if plume_cities is None or plume_cities.empty:
+            hits.append([[] for _ in range(plume.shape[0])])
+            continue
+        mask = points_in_polygons(plume_cities[['latitude', 'longitude']].to_numpy(), plume)
+        names = plume_cities['loc_name'].to_numpy()
+        hits.append([names[row].tolist() for row in mask])
+    return hits
+
+def plumes_to_geojson(polygons, arc_aqi, labels=None, city_hits=None):
+    """
+    Pack many plumes into one GeoJSON FeatureCollection, outer arcs first.
+
+    Colors come from the shared AQI lookup table, so a single GeoJson layer can
+    style every arc without one folium object per polygon.
+    """
+    n_plumes, num_arcs = arc_aqi.shape
+    distance_ratio = np.broadcast_to(np.arange(num_arcs) / num_arcs, arc_aqi.shape)
+    colors = aqi_colors_hex(arc_aqi * PLUME_COLOR_SCALE, distance_ratio)
+
+    features = []
+    for arc in reversed(range(num_arcs)):
+        for plume in range(n_plumes):
+            features.append({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [polygons[plume, arc][:, ::-1].round(6).tolist()]
+                },
+                'properties': {
+                    'plant': labels[plume] if labels is not None else plume,
+                    'aqi': round(float(arc_aqi[plume, arc]), 1),
+                    'cities': ', '.join(city_hits[plume][arc]) if city_hits is not None else '',
+                    'color': str(colors[plume, arc]),
+                }
+            })
+    return {'type': 'FeatureCollection', 'features': features}
+
+def plume_concentration_grid(lat, lon, wind_speed, wind_direction, aqi, stability_class='D',
+                             extent_m=20000, size=200, batch_hours=64):
+    """
+    Accumulate hourly plume concentrations on a fixed lat/lon grid around one source.
+
+    The field follows the arc geometry: AQI decays by 0.65 every 140 * wind_speed
+    meters downwind and spreads crosswind as a Gaussian as wide as the arcs.
+
+    Args:
+    - lat, lon (float): Source location.
+    - wind_speed, wind_direction, aqi: Hourly arrays of equal length.
+    - extent_m (float): Half-width of the square grid in meters.
+    - size (int): Number of cells per side.
+
+    Returns:
+    - total (ndarray): (size, size) sum of hourly concentrations at the map color scale (AQI x PLUME_COLOR_SCALE), row 0 at the north edge.
+    - bounds (list): [[south, west], [north, east]] for map overlays.
+    """
+    wind_speed = np.asarray(wind_speed, dtype=float)
+    wind_rad = np.radians(np.asarray(wind_direction, dtype=float))
+    aqi = np.asarray(aqi, dtype=float)
+    spread = stability_coefficients(stability_class) / STABILITY_PARAMS['D'][0]
+
+    lon_factor = LAT_FACTOR * np.cos(np.radians(lat))
+    offsets = np.linspace(-extent_m, extent_m, size, dtype=np.float32)
+    north = offsets[::-1, None]  # row 0 is the northern edge
+    east = offsets[None, :]
+
+    valid = (wind_speed > 0) & np.isfinite(wind_rad) & np.isfinite(aqi)
+    wind_speed, wind_rad, aqi = wind_speed[valid], wind_rad[valid], aqi[valid]
+    log_decay = np.float32(np.log(0.65))
+
+    total = np.zeros((size, size))
+    for start in range(0, len(wind_speed), batch_hours):
+        batch = slice(start, start + batch_hours)
+        speed = wind_speed[batch, None, None].astype(np.float32)
+        cos_w = np.cos(wind_rad[batch, None, None]).astype(np.float32)
+        sin_w = np.sin(wind_rad[batch, None, None]).astype(np.float32)
+
+        downwind = np.maximum(-(north * cos_w + east * sin_w), 0)
+        crosswind = -north * sin_w + east * cos_w
+        arcs = downwind / (140 * speed)
+        sigma_y = 15 * speed * (1 + arcs) * np.float32(spread)
+        concentration = np.exp(arcs * log_decay - crosswind ** 2 / (2 * sigma_y ** 2))
+        concentration *= (downwind > 0)
+        total += np.tensordot(PLUME_COLOR_SCALE * aqi[batch], concentration, axes=1)
+
+    bounds = [[lat - extent_m / LAT_FACTOR, lon - extent_m / lon_factor],
+              [lat + extent_m / LAT_FACTOR, lon + extent_m / lon_factor]]
+    return total, bounds
+
+def concentration_to_rgba(total, hours):
+    """Color an accumulated grid with the AQI lookup table; opacity follows the cumulative load."""
+    mean = total / max(hours, 1)
+    rgba = aqi_colors_rgba(mean, 0).copy()
+    peak = total.max()
+    alpha = np.sqrt(total / peak) if peak > 0 else np.zeros_like(total)
+    rgba[..., 3] = (alpha * 200).astype(np.uint8)
+    return rgba
@@ -0,0 +1,122 @@
+# src/rolling_stats.py
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.config import rolling_windows, rolling_max_plants, exceedance_thresholds
+
+ROLLING_VARIABLES = ['temperature_2m', 'wind_speed_100m', 'pm10', 'pm2_5',
+                     'nitrogen_dioxide', 'sulphur_dioxide', 'ozone', 'european_aqi']
+
+class RollingStats:
+    """
+    Rolling mean, min, max, std and exceedance counts for one plant.
+
+    Hourly values and computed statistics are kept in memory. extend() merges new
+    hours and recomputes only from the earliest changed hour, reading back just
+    enough history to fill the longest window.
+    """
+
+    def __init__(self, windows=None, variables=None, thresholds=None):
+        self.windows = windows or rolling_windows
+        self.variables = variables or ROLLING_VARIABLES
+        self.thresholds = {k: v for k, v in (thresholds or exceedance_thresholds).items() if k in self.variables}
+        self.values = pd.DataFrame(columns=self.variables, dtype=float)
+        self.stats = pd.DataFrame(dtype=np.float32)
+
+    def missing_cells(self, df):
+        """
+        The cells of df that would fill a gap in the stored values.
+
+        Gap hours exist in the index as NaN rows, so missing is decided per
+        variable rather than per hour. Returns only the rows with at least one
+        such cell, with every other cell NaN.
+        """
+        columns = [c for c in self.variables if c in df.columns]
+        new = df[columns].apply(pd.to_numeric, errors='coerce')
+        current = self.values.reindex(new.index)[columns]
+        fills = current.isna() & new.notna()
+        return new.where(fills)[fills.any(axis=1)]
+
+    def extend(self, df):
+        """Merge hourly rows (DatetimeIndex) and update statistics from the first changed hour."""
+        df = df[[c for c in self.variables if c in df.columns]].apply(pd.to_numeric, errors='coerce')
+        if df.empty:
+            return
+        first_changed = df.index.min()
+
+        if self.values.empty or first_changed > self.values.index.max():
+            self.values = pd.concat([self.values, df]) if not self.values.empty else df.reindex(columns=self.variables)
+        else:
+            self.values = df.combine_first(self.values)[self.variables]
+        self.values = self.values[~self.values.index.duplicated(keep='last')].asfreq('h')
+
+        context_start = first_changed - pd.Timedelta(hours=max(self.windows.values()) - 1)
+        updated = self._compute(self.values.loc[context_start:]).loc[first_changed:]
+        kept = self.stats.loc[:first_changed - pd.Timedelta(hours=1)] if not self.stats.empty else None
+        self.stats = pd.concat([kept, updated]) if kept is not None and not kept.empty else updated
+
+    def _compute(self, values):
+        columns = {}
+        for label, hours in self.windows.items():
+            rolling = values.rolling(hours, min_periods=1)
+            for name, frame in (('mean', rolling.mean()), ('min', rolling.min()),
+                                ('max', rolling.max()), ('std', rolling.std())):
+                for variable in self.variables:
+                    columns[f"{variable}_{name}_{label}"] = frame[variable]
+            for variable, threshold in self.thresholds.items():
+                exceeded = (values[variable] > threshold).astype(np.float32)
+                columns[f"{variable}_exceed_{label}"] = exceeded.rolling(hours, min_periods=1).sum()
+        return pd.DataFrame(columns, index=values.index).astype(np.float32)
+
+    def get(self, start=None, end=None):
+        return self.stats.loc[start:end]
+
+    def exceedances(self, at, window='24h'):
+        """Exceedance hour counts per variable in the window ending at hour `at`."""
+        at = pd.Timestamp(at)
+        if self.stats.empty or at not in self.stats.index:
+            return pd.Series(dtype=float)
+        row = self.stats.loc[at]
+        return pd.Series({variable: row[f"{variable}_exceed_{window}"] for variable in self.thresholds})
+
+# Most recently used last; bounded because each state holds a plant's whole history
+_states = OrderedDict()
+_lock = threading.Lock()
+
+def get_rolling_stats(plant_id):
+    with _lock:
+        plant_id = int(plant_id)
+        state = _states.get(plant_id)
+        if state is None:
+            state = _states[plant_id] = RollingStats()
+            while len(_states) > rolling_max_plants:
+                _states.popitem(last=False)
+        _states.move_to_end(plant_id)
+        return state
+
+def update_rolling_stats(plant_id, df):
+    """
+    Extend a plant's statistics with newly ingested hourly rows.
+
+    Only plants already held in memory are updated; others are built from their
+    stored history the next time a page asks for them.
+    """
+    with _lock:
+        state = _states.get(int(plant_id))
+        if state is not None:
+            state.extend(df)
+
+def ensure_rolling_stats(plant_id, df):
+    """Extend with any values of df the state does not hold yet and return the state."""
+    state = get_rolling_stats(plant_id)
+    with _lock:
+        missing = state.missing_cells(df)
+        if not missing.empty:
+            state.extend(missing)
+    return state
+
+def exceedance_alerts(plant_id, at, window='24h', min_hours=1):
+    """Variables whose exceedance count in the window ending at hour `at` reaches min_hours."""
+    counts = get_rolling_stats(plant_id).exceedances(at, window)
+    return counts[counts >= min_hours].sort_values(ascending=False)
@@ -0,0 +1,83 @@
+# src/scenarios.py
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.plume import LAT_FACTOR, STABILITY_PARAMS, gaussian_plume_arcs, points_in_polygons
+
+def scenario_grid(stability_classes=tuple(STABILITY_PARAMS), wind_speed_factors=(1.0,),
+                  direction_offsets=(0,), aqi_multipliers=(1.0,)):
+    """Every combination of stability class, wind perturbation and AQI multiplier."""
+    return pd.DataFrame(
+        list(itertools.product(stability_classes, wind_speed_factors, direction_offsets, aqi_multipliers)),
+        columns=['stability_class', 'wind_speed_factor', 'direction_offset', 'aqi_multiplier']
+    )
+
+def footprint_km2(polygons, lat, lon):
+    """Shoelace area of (N, K, 2) lat/lon rings in square kilometers."""
+    y = (polygons[..., 0] - lat) * LAT_FACTOR
+    x = (polygons[..., 1] - lon) * LAT_FACTOR * np.cos(np.radians(lat))
+    area = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=-1) - np.roll(x, -1, axis=-1) * y, axis=-1))
+    return area / 1e6
+
+def _evaluate_chunk(lat, lon, wind_speed, wind_direction, aqi, grid, num_arcs, city_points):
+    polygons, arc_aqi = gaussian_plume_arcs(
+        lat, lon,
+        wind_speed * grid['wind_speed_factor'].to_numpy(dtype=float),
+        (wind_direction + grid['direction_offset'].to_numpy(dtype=float)) % 360,
+        stability_class=grid['stability_class'].to_numpy(),
+        aqi=aqi * grid['aqi_multiplier'].to_numpy(dtype=float),
+        num_arcs=num_arcs
+    )
+    metrics = {
+        'footprint_km2': footprint_km2(polygons[:, -1], lat, lon),
+        'peak_aqi': arc_aqi.max(axis=1),
+    }
+    if city_points is not None and len(city_points):
+        inside = points_in_polygons(city_points, polygons)  # (scenarios, arcs, cities)
+        city_aqi = np.where(inside, arc_aqi[:, :, None], 0).max(axis=1)
+        metrics['cities_affected'] = np.count_nonzero(city_aqi > 0, axis=1)
+        metrics['max_city_aqi'] = city_aqi.max(axis=1)
+    return polygons, arc_aqi, pd.DataFrame(metrics, index=grid.index)
+
+def evaluate_scenarios(lat, lon, wind_speed, wind_direction, aqi, grid, num_arcs=8, cities=None,
+                       workers=None, chunk_size=2000, parallel_threshold=5000):
+    """
+    Plumes and footprint metrics for every scenario of one plant-hour.
+
+    The grid is evaluated as one vectorized batch; grids of parallel_threshold rows
+    or more are split into chunks and spread over a process pool.
+
+    Args:
+    - lat, lon, wind_speed, wind_direction, aqi (float): Observed plant-hour values.
+    - grid (DataFrame): Output of scenario_grid.
+    - cities (DataFrame): Optional cities with 'latitude' and 'longitude' to count exposure.
+
+    Returns:
+    - results (DataFrame): grid plus footprint_km2, peak_aqi and, with cities, cities_affected and max_city_aqi.
+    - polygons (ndarray): (scenarios, num_arcs, points, 2) arc rings.
+    - arc_aqi (ndarray): (scenarios, num_arcs) AQI per arc.
+    """
+    grid = grid.reset_index(drop=True)
+    city_points = cities[['latitude', 'longitude']].to_numpy(dtype=float) if cities is not None else None
+    args = (lat, lon, wind_speed, wind_direction, aqi)
+
+    if len(grid) < parallel_threshold or workers == 1:
+        polygons, arc_aqi, metrics = _evaluate_chunk(*args, grid, num_arcs, city_points)
+    else:
+        chunks = [grid.iloc[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            parts = list(executor.map(
+                _evaluate_chunk,
+                *zip(*[(*args, chunk, num_arcs, city_points) for chunk in chunks])
+            ))
+        polygons = np.concatenate([part[0] for part in parts])
+        arc_aqi = np.concatenate([part[1] for part in parts])
+        metrics = pd.concat([part[2] for part in parts])
+
+    return pd.concat([grid, metrics], axis=1), polygons, arc_aqi
+
+def worst_cases(results, by='footprint_km2', n=10):
+    """Scenarios with the largest footprint (or another metric column)."""
+    return results.sort_values(by, ascending=False).head(n)
@@ -0,0 +1,241 @@
+# src/stub_server.py
+"""
+Local stand-in for the Open-Meteo archive and air-quality APIs.
+
+Serves the same paths as api_config with deterministic hourly payloads for any
+lat/lon/date range, plus configurable latency, server errors and 429 responses.
+Point the app at it with TPP_API_BASE_URL=http://localhost:8765, or measure
+fetch+insert throughput directly:
+
+    python -m src.stub_server --port 8765
+    python -m src.stub_server --bench 10 --bench-days 365 [--insert-db tpp_bench]
+
+Inserting benchmark rows is only allowed into a scratch database (name containing
+test, scratch or bench); they are mirrored into a temporary hourly store. Failed
+plants (e.g. from --error-rate) are counted and reported, not fatal.
+"""
+import json
+import time
+import zlib
+import random
+import shutil
+import tempfile
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.config import api_config
+
+SCRATCH_DB_MARKERS = ('test', 'scratch', 'bench')
+
+ENDPOINTS = {urlparse(config['base_url']).path: data_type for data_type, config in api_config.items()}
+
+# (baseline, daily amplitude, seasonal amplitude, noise amplitude, lower bound, upper bound)
+VARIABLE_SHAPES = {
+    'temperature_2m': (10, 5, 12, 2, -40, 45),
+    'precipitation': (-0.5, 0.3, 0.5, 1.5, 0, None),
+    'rain': (-0.5, 0.3, 0.5, 1.5, 0, None),
+    'snowfall': (-1.0, 0.1, 1.0, 0.8, 0, None),
+    'wind_speed_10m': (4, 1.5, 1, 2, 0, None),
+    'wind_speed_100m': (7, 2, 1.5, 3, 0, None),
+    'wind_direction_10m': (180, 60, 40, 120, 0, 359),
+    'wind_direction_100m': (180, 60, 40, 120, 0, 359),
+    'carbon_dioxide': (420, 10, 5, 5, 0, None),
+    'methane': (1900, 40, 20, 20, 0, None),
+    'european_aqi': (40, 15, 10, 15, 0, None),
+}
+DEFAULT_SHAPE = (20, 8, 6, 8, 0, None)
+
+def _noise(hours, seed):
+    """Deterministic pseudo-random values in [-1, 1) per absolute hour."""
+    x = np.sin(hours * 12.9898 + seed * 78.233) * 43758.5453
+    return (x - np.floor(x)) * 2 - 1
+
+def generate_hourly(variables, latitude, longitude, start_date, end_date):
+    """Hourly values that depend only on variable, location and timestamp."""
+    times = pd.date_range(start_date, pd.Timestamp(end_date) + pd.Timedelta(hours=23), freq='h')
+    hours = ((times - pd.Timestamp('2000-01-01')) // pd.Timedelta(hours=1)).to_numpy(dtype=float)
+    day_of_year = times.dayofyear.to_numpy(dtype=float)  # Seasonal peak in mid July
+    hourly = {'time': times.strftime('%Y-%m-%dT%H:%M').tolist()}
+    for variable in variables:
+        base, daily, seasonal, noise, low, high = VARIABLE_SHAPES.get(variable, DEFAULT_SHAPE)
+        seed = zlib.crc32(f"{variable}:{latitude:.2f}:{longitude:.2f}".encode()) % 1000
+        values = (base
+                  + daily * np.sin(2 * np.pi * (hours % 24) / 24 + seed)
+                  + seasonal * np.cos(2 * np.pi * (day_of_year - 196) / 365.25)
+                  + noise * _noise(hours, seed))
+        values = np.clip(values, low, high).round(2)
+        hourly[variable] = values.tolist()
+    return hourly
+
+class StubConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_429=0.0, retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(0, self.jitter_ms)
+
+def make_handler(config):
+    class OpenMeteoStubHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            data_type = ENDPOINTS.get(url.path)
+            if data_type is None:
+                return self._send_json(404, {'error': True, 'reason': f'Unknown endpoint {url.path}'})
+
+            roll, jitter = config.draw()
+            time.sleep((config.latency_ms + jitter) / 1000)
+            if roll < config.rate_429:
+                return self._send_json(429, {'error': True, 'reason': 'Too many requests'},
+                                       {'Retry-After': str(config.retry_after)})
+            if roll < config.rate_429 + config.error_rate:
+                return self._send_json(500, {'error': True, 'reason': 'Injected error'})
+
+            try:
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                latitude, longitude = float(query['latitude']), float(query['longitude'])
+                variables = query.get('hourly', ','.join(api_config[data_type]['params'])).split(',')
+                hourly = generate_hourly(variables, latitude, longitude, query['start_date'], query['end_date'])
+            except (KeyError, ValueError) as e:
+                return self._send_json(400, {'error': True, 'reason': str(e)})
+
+            self._send_json(200, {
+                'latitude': latitude,
+                'longitude': longitude,
+                'elevation': 100.0,
+                'hourly_units': {variable: '' for variable in variables},
+                'hourly': hourly,
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return OpenMeteoStubHandler
+
+def start_server(host='127.0.0.1', port=8765, config=None):
+    """Start the stub in a background thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(config or StubConfig()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_benchmark(base_url, n_plants, days, insert_db=None, workers=4):
+    """
+    Fetch `days` of data for n_plants; returns rows per second.
+
+    A plant whose fetch or insert fails is counted as failed and the run goes on.
+
+    With insert_db, rows are also inserted into that database, which must be a
+    scratch copy: synthetic values are written under its real plant ids.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from src.update_db import WeatherFetcher, insert_combined_data
+    from src.timeseries_store import HourlyStore
+
+    insert = insert_db is not None
+    if insert:
+        import psycopg2
+        from src.config import db_params
+        if not any(marker in insert_db.lower() for marker in SCRATCH_DB_MARKERS):
+            raise ValueError(f"Refusing to insert synthetic data into '{insert_db}': "
+                             f"use a scratch database whose name contains one of {SCRATCH_DB_MARKERS}")
+        target = dict(db_params, database=insert_db)
+        conn = psycopg2.connect(**target)
+        try:
+            plants = pd.read_sql("SELECT id, latitude, longitude FROM dwh.v_plant_dates ORDER BY id LIMIT %s",
+                                 conn, params=(n_plants,))
+        finally:
+            conn.close()
+        plants = plants.itertuples(index=False)
+    else:
+        plants = [(i, 45 + i * 0.1, 30 + i * 0.1) for i in range(n_plants)]
+
+    end = pd.Timestamp('2023-12-31')
+    start = end - pd.Timedelta(days=days - 1)
+    fetcher = WeatherFetcher(base_url=base_url)
+
+    def load(plant):
+        plant_id, latitude, longitude = plant
+        df = fetcher.fetch_combined(latitude, longitude, f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}")
+        if insert:
+            conn = psycopg2.connect(**target)
+            try:
+                insert_combined_data(conn, df, plant_id, store)
+            finally:
+                conn.close()
+        return len(df)
+
+    def load_or_fail(plant):
+        try:
+            return load(plant), None
+        except Exception as e:
+            return 0, f"{type(e).__name__}: {e}"
+
+    # after_commit mirrors inserts into the hourly store; keep the real one untouched
+    store_path = tempfile.mkdtemp(prefix='tpp_bench_store_') if insert else None
+    store = HourlyStore(path=store_path) if insert else None
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(load_or_fail, list(plants)))
+        elapsed = time.perf_counter() - started
+    finally:
+        if store_path is not None:
+            shutil.rmtree(store_path, ignore_errors=True)
+
+    rows = sum(rows for rows, _ in results)
+    errors = [error for _, error in results if error is not None]
+    print(f"{rows} hourly rows in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s, insert={insert}), "
+          f"{len(errors)} of {len(results)} plants failed")
+    for error in sorted(set(errors)):
+        print(f"  {errors.count(error)} x {error}")
+    return rows / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Open-Meteo stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--bench", type=int, metavar="N_PLANTS", help="Run a throughput benchmark against the stub")
+    parser.add_argument("--bench-days", type=int, default=30)
+    parser.add_argument("--bench-workers", type=int, default=4)
+    parser.add_argument("--insert-db", metavar="DATABASE",
+                        help="Insert fetched rows into this scratch database during --bench")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_429, args.retry_after, args.seed)
+    server = start_server(args.host, args.port, config)
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+
+    if args.bench:
+        run_benchmark(base_url, args.bench, args.bench_days, args.insert_db, args.bench_workers)
+        server.shutdown()
+    else:
+        print(f"Serving Open-Meteo stub on {base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
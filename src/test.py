@@ -3,40 +3,8 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 
-# Interpolating colors based on AQI
-def interpolate_color(value, min_value, max_value, start_color, end_color):
-    ratio = (value - min_value) / (max_value - min_value)
-    ratio = max(0, min(ratio, 1))  # Clamp between 0 and 1
-
-    def hex_to_rgb(hex_color):
-        return tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-
-    def rgb_to_hex(rgb_color):
-        return '#' + ''.join(f'{int(c):02x}' for c in rgb_color)
-
-    start_rgb = hex_to_rgb(start_color)
-    end_rgb = hex_to_rgb(end_color)
-    blended_rgb = tuple(start_rgb[i] + ratio * (end_rgb[i] - start_rgb[i]) for i in range(3))
-
-    return rgb_to_hex(blended_rgb)
-
-# Determine color based on AQI
-def get_air_quality_color_gradient(aqi, distance_ratio):
-    green_color = '#00FF00'
-    if aqi <= 50:
-        start_color = '#00FF00'  # Green
-    elif aqi <= 100:
-        start_color = '#FFFF00'  # Yellow
-    elif aqi <= 150:
-        start_color = '#FFA500'  # Orange
-    elif aqi <= 200:
-        start_color = '#FF0000'  # Red
-    elif aqi <= 300:
-        start_color = '#800080'  # Purple
-    else:
-        start_color = '#A52A2A'  # Brown
-
-    return interpolate_color(distance_ratio, 0, 1, start_color, green_color)
+# AQI colors come from the shared lookup table so they match the app pages
+from src.utils import get_air_quality_color_gradient
 
 # Generate Gaussian plume polygons
 def generate_gaussian_plume(lat, lon, wind_speed, wind_direction, stability_class='D', aqi=100, num_arcs=10):
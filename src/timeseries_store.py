@@ -0,0 +1,146 @@
+# src/timeseries_store.py
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from src.config import store_config, weather_hourly, air_quality_hourly
+
+VARIABLES = weather_hourly + air_quality_hourly
+
+class HourlyStore:
+    """
+    Dense hourly grid on disk: one memory-mapped float64 array per plant and variable.
+
+    Index i holds the value for start_date + i hours; gaps are NaN. Files grow in
+    chunks of chunk_hours when ingestion writes past the end.
+    """
+
+    def __init__(self, path=None, start_date=None, chunk_hours=None):
+        self.path = path or store_config['path']
+        self.start = pd.Timestamp(start_date or store_config['start_date'])
+        self.chunk_hours = chunk_hours or store_config['chunk_hours']
+        self._maps = {}
+
+    def hour_offset(self, timestamps):
+        """Hour offsets from the store start for a timestamp or DatetimeIndex."""
+        delta = pd.to_datetime(timestamps) - self.start
+        if isinstance(delta, pd.Timedelta):
+            return int(delta // pd.Timedelta(hours=1))
+        return np.asarray(delta // pd.Timedelta(hours=1), dtype=np.int64)
+
+    def _file(self, plant_id, variable):
+        return os.path.join(self.path, str(int(plant_id)), f"{variable}.npy")
+
+    def _open(self, plant_id, variable):
+        """Read-only map of an existing file, reopened only when the file has grown."""
+        path = self._file(plant_id, variable)
+        if not os.path.exists(path):
+            return None
+        size = os.path.getsize(path)
+        cached = self._maps.get(path)
+        if cached is None or cached[0] != size:
+            cached = (size, np.load(path, mmap_mode='r'))
+            self._maps[path] = cached
+        return cached[1]
+
+    def _open_for_write(self, plant_id, variable, min_length):
+        path = self._file(plant_id, variable)
+        capacity = -(-min_length // self.chunk_hours) * self.chunk_hours
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(capacity,))
+            array[:] = np.nan
+            return array
+
+        array = np.load(path, mmap_mode='r+')
+        if len(array) >= min_length:
+            return array
+
+        # Grow into a new file and swap it in, so readers never see a partial array
+        tmp_path = path + '.tmp'
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=(capacity,))
+        grown[:len(array)] = array
+        grown[len(array):] = np.nan
+        grown.flush()
+        del array, grown
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode='r+')
+
+    def write_frame(self, plant_id, df):
+        """
+        Write an hourly DataFrame (DatetimeIndex, variable columns) into the store.
+
+        Missing cells are skipped, so a partial frame never blanks stored values.
+        """
+        if df.empty:
+            return
+        offsets = self.hour_offset(df.index)
+        for variable in df.columns.intersection(VARIABLES):
+            values = pd.to_numeric(df[variable], errors='coerce').to_numpy(dtype=float)
+            keep = (offsets >= 0) & np.isfinite(values)
+            if not keep.any():
+                continue
+            array = self._open_for_write(plant_id, variable, int(offsets[keep].max()) + 1)
+            array[offsets[keep]] = values[keep]
+            array.flush()
+
+    def read_range(self, plant_id, variable, start, end):
+        """
+        Values for hours in [start, end).
+
+        Returns a zero-copy slice of the memory map when the range is fully stored,
+        otherwise a NaN-padded copy.
+        """
+        first, last = self.hour_offset(start), self.hour_offset(end)
+        array = self._open(plant_id, variable)
+        if array is not None and 0 <= first and last <= len(array):
+            return array[first:last]
+
+        out = np.full(max(last - first, 0), np.nan)
+        if array is not None:
+            lo, hi = max(first, 0), min(last, len(array))
+            if lo < hi:
+                out[lo - first:hi - first] = array[lo:hi]
+        return out
+
+    def read_hour(self, plant_id, timestamp, variables=None):
+        """Values of one hour as a dict, NaN where missing."""
+        offset = self.hour_offset(timestamp)
+        values = {}
+        for variable in variables or VARIABLES:
+            array = self._open(plant_id, variable)
+            in_range = array is not None and 0 <= offset < len(array)
+            values[variable] = float(array[offset]) if in_range else np.nan
+        return values
+
+    def read_frame(self, plant_id, start, end, variables=None):
+        """Hourly DataFrame for [start, end) assembled from the stored slices."""
+        index = pd.date_range(start, end, freq='h', inclusive='left')
+        return pd.DataFrame(
+            {variable: self.read_range(plant_id, variable, start, end) for variable in variables or VARIABLES},
+            index=index
+        )
+
+def stat_to_hourly_frame(data):
+    """Index get_stat_by_plant_id rows by hourly timestamp."""
+    index = pd.to_datetime(data['dateid'].astype(str), format='%Y%m%d') + pd.to_timedelta(data['record_hour'], unit='h')
+    return data.set_index(index)[[c for c in VARIABLES if c in data.columns]]
+
+def rebuild_from_db(plant_ids=None, store=None):
+    """Backfill the store from the database for the given plants (all plants by default)."""
+    from src.utils import get_data, get_stat_by_plant_id
+
+    store = store or HourlyStore()
+    if plant_ids is None:
+        plant_ids = get_data("SELECT id FROM dwh.v_plant_dates")['id'].tolist()
+    for plant_id in plant_ids:
+        data = get_stat_by_plant_id(plant_id, store.start)
+        store.write_frame(plant_id, stat_to_hourly_frame(data))
+        print(f"Stored {len(data)} hours for plant {plant_id}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the hourly time-series store from the database")
+    parser.add_argument("plant_ids", nargs="*", type=int, help="Plants to rebuild (default: all)")
+    args = parser.parse_args()
+    rebuild_from_db(args.plant_ids or None)
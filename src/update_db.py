@@ -1,14 +1,45 @@
 # src/update_db.py
 import pandas as pd
+import time
 import requests
-from datetime import datetime
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
-from src.config import db_params, api_config
+from src.config import db_params, api_config, api_base_url_override
+from src.timeseries_store import HourlyStore
+from src.cache import query_cache
+from src.rolling_stats import update_rolling_stats
 
-class WeatherFetcher:
-    def __init__(self):
+def retry_after_seconds(value, default):
+    """Seconds to wait for a Retry-After header given as delay-seconds or an HTTP date."""
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
         pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+class WeatherFetcher:
+    def __init__(self, base_url=None, max_retries=3):
+        # Replaces scheme and host of the configured endpoints, keeping their paths
+        self.base_url = base_url or api_base_url_override
+        self.max_retries = max_retries
+
+    def _endpoint(self, data_type: str) -> str:
+        url = api_config[data_type]['base_url']
+        if self.base_url:
+            url = self.base_url.rstrip('/') + urlparse(url).path
+        return url
 
     def _format_dataframe(self, data: Dict) -> pd.DataFrame:
         df = pd.DataFrame(data['hourly'])
@@ -22,7 +53,7 @@ class WeatherFetcher:
 
     def fetch_data(self, data_type: str, latitude: float, longitude: float, 
                    start_date: str, end_date: str) -> pd.DataFrame:
-        base_url = api_config[data_type]['base_url']
+        base_url = self._endpoint(data_type)
         params = {
             "latitude": latitude,
             "longitude": longitude,
@@ -32,13 +63,41 @@ class WeatherFetcher:
         }
         
         response = requests.get(base_url, params=params)
+        for attempt in range(self.max_retries):
+            if response.status_code != 429:
+                break
+            # Rate limited: honour Retry-After, otherwise back off exponentially
+            time.sleep(retry_after_seconds(response.headers.get('Retry-After'), 2 ** attempt))
+            response = requests.get(base_url, params=params)
         print(response.url)
         if response.ok:
             return self._format_dataframe(response.json())
         else:
             raise Exception(f"API request failed: {response.status_code}")
 
-def insert_weather_data(conn, df, power_plant_id):
+    def fetch_combined(self, latitude: float, longitude: float,
+                       start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch weather and air quality concurrently and align them on the hourly index."""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                data_type: executor.submit(self.fetch_data, data_type, latitude, longitude,
+                                           start_date, end_date)
+                for data_type in ('weather', 'air_quality')
+            }
+            weather_df = futures['weather'].result()
+            air_quality_df = futures['air_quality'].result()
+
+        df = weather_df.join(air_quality_df, how='outer')
+        df.attrs.update(weather_df.attrs)
+        return df
+
+def after_commit(df, power_plant_id, store=None):
+    """Mirror committed rows into the hourly store and rolling statistics, and invalidate cached queries."""
+    (store or HourlyStore()).write_frame(power_plant_id, df)
+    update_rolling_stats(power_plant_id, df)
+    query_cache.bump_data_version(power_plant_id)
+
+def insert_weather_data(conn, df, power_plant_id, commit=True):
     cursor = conn.cursor()
     for idx, row in df.iterrows():
         dateid = int(idx.strftime('%Y%m%d'))
@@ -66,10 +125,12 @@ def insert_weather_data(conn, df, power_plant_id):
         
         cursor.execute(sql, values)
     
-    conn.commit()
+    if commit:
+        conn.commit()
+        after_commit(df, power_plant_id)
     cursor.close()
 
-def insert_air_quality_data(conn, df, power_plant_id):
+def insert_air_quality_data(conn, df, power_plant_id, commit=True):
     cursor = conn.cursor()
     for idx, row in df.iterrows():
         dateid = int(idx.strftime('%Y%m%d'))
@@ -105,5 +166,20 @@ def insert_air_quality_data(conn, df, power_plant_id):
         
         cursor.execute(sql, values)
     
-    conn.commit()
-    cursor.close()
\ No newline at end of file
+    if commit:
+        conn.commit()
+        after_commit(df, power_plant_id)
+    cursor.close()
+
+def insert_combined_data(conn, df, power_plant_id, store=None):
+    """Insert weather and air quality rows from one aligned frame in a single transaction."""
+    weather_df = df[api_config['weather']['params']].dropna(how='all')
+    air_quality_df = df[api_config['air_quality']['params']].dropna(how='all')
+    try:
+        insert_weather_data(conn, weather_df, power_plant_id, commit=False)
+        insert_air_quality_data(conn, air_quality_df, power_plant_id, commit=False)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    after_commit(df, power_plant_id, store)
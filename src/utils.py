@@ -1,7 +1,9 @@
 import psycopg2
 import pandas as pd
 from src.config import *
+from src.cache import query_cache
 import math
+import numpy as np
 import folium
 import random
 import json
@@ -12,24 +14,140 @@ def get_data(query, params=None):
     conn.close()
     return df
 
+def get_cached_data(query, params=None, plant_id=None):
+    """get_data through the shared query cache; plant_id ties the entry to that plant's data version."""
+    return query_cache.get_or_load(query, params, plant_id, lambda: get_data(query, params))
+
 def load_plant_data():
     query = "SELECT * FROM dwh.v_plant_dates vpd"
-    df = get_data(query)
+    df = get_cached_data(query)
     df['weather_min_date'] = pd.to_datetime(df['weather_min_date'], format='%Y%m%d')
     df['weather_max_date'] = pd.to_datetime(df['weather_max_date'], format='%Y%m%d')
     return df
 
+def get_stat_by_plant_id(plant_id, start_date, end_date=None, record_hour=None, cached=True):
+    """Hourly statistics of one plant; batch jobs pass cached=False to bypass the query cache."""
+    query = """
+        SELECT * FROM dwh.get_stat_by_plant_id(%s, %s, %s, %s)
+    """
+    params = (
+        int(plant_id), 
+        int(start_date.strftime('%Y%m%d')), 
+        int(end_date.strftime('%Y%m%d')) if end_date else None, 
+        int(record_hour) if record_hour is not None else None
+    )
+    if not cached:
+        return get_data(query, params)
+    return get_cached_data(query, params, plant_id=int(plant_id))
+
+def get_daily_stat_by_plant_id(plant_id, start_date, end_date=None):
+    """Daily means (and precipitation totals) aggregated in the database."""
+    query = """
+        SELECT dateid,
+               avg(temperature_2m) AS temperature_2m,
+               sum(precipitation) AS precipitation,
+               avg(wind_speed_100m) AS wind_speed_100m,
+               avg(pm10) AS pm10,
+               avg(pm2_5) AS pm2_5,
+               avg(nitrogen_dioxide) AS nitrogen_dioxide,
+               avg(sulphur_dioxide) AS sulphur_dioxide,
+               avg(ozone) AS ozone,
+               max(european_aqi) AS european_aqi
+        FROM dwh.get_stat_by_plant_id(%s, %s, %s, NULL)
+        GROUP BY dateid
+        ORDER BY dateid
+    """
+    params = (
+        int(plant_id),
+        int(start_date.strftime('%Y%m%d')),
+        int(end_date.strftime('%Y%m%d')) if end_date else None
+    )
+    return get_cached_data(query, params, plant_id=int(plant_id))
+
+def get_fleet_stat(selected_date, record_hour):
+    """Wind and AQI for every plant at one date/hour in a single set query."""
+    query = """
+        SELECT vpd.id AS plant_id, vpd.plant_name,
+               s.latitude, s.longitude, s.wind_speed_100m, s.wind_direction_100m, s.european_aqi
+        FROM dwh.v_plant_dates vpd
+        CROSS JOIN LATERAL dwh.get_stat_by_plant_id(vpd.id, %s, %s, %s) s
+    """
+    dateid = int(selected_date.strftime('%Y%m%d'))
+    return get_cached_data(query, (dateid, dateid, int(record_hour)))
+
+def load_plant_cities():
+    """Cities linked to each plant; loc_coords stores (lat, lon) as (x, y) like the plume geometries."""
+    query = """
+        SELECT ctpp.plant_id, l.loc_name,
+               gs.ST_X(ctpp.loc_coords) AS latitude,
+               gs.ST_Y(ctpp.loc_coords) AS longitude
+        FROM dwh.city_to_power_plant ctpp
+        JOIN dwh.locations l ON l.id = ctpp.loc_id
+    """
+    return get_cached_data(query)
+
+# AQI bands: upper bounds (inclusive) and the starting color of each band.
+# Arcs fade from the band color towards green as the distance ratio grows.
+AQI_BAND_EDGES = np.array([50, 100, 150, 200, 300])
+AQI_BAND_COLORS = ['#00FF00', '#FFFF00', '#FFA500', '#FF0000', '#800080', '#A52A2A']
+AQI_FADE_COLOR = '#00FF00'
+COLOR_LUT_STEPS = 256
+
+def hex_to_rgb(hex_color):
+    return tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+
+def rgb_to_hex(rgb_color):
+    return '#' + ''.join(f'{int(c):02x}' for c in rgb_color)
+
+def _build_color_lut():
+    """RGBA table of shape (band, quantized distance ratio, 4)."""
+    start = np.array([hex_to_rgb(c) for c in AQI_BAND_COLORS], dtype=float)
+    end = np.array(hex_to_rgb(AQI_FADE_COLOR), dtype=float)
+    ratio = np.linspace(0, 1, COLOR_LUT_STEPS)[None, :, None]
+    rgb = start[:, None, :] + ratio * (end - start[:, None, :])
+    lut = np.empty((len(AQI_BAND_COLORS), COLOR_LUT_STEPS, 4), dtype=np.uint8)
+    lut[..., :3] = rgb.astype(np.uint8)
+    lut[..., 3] = 255
+    return lut
+
+COLOR_LUT = _build_color_lut()
+COLOR_LUT_HEX = np.array(
+    [[rgb_to_hex(rgba[:3]) for rgba in band] for band in COLOR_LUT]
+)
+
+def aqi_band(aqi):
+    """Index into AQI_BAND_COLORS for each AQI value."""
+    return np.searchsorted(AQI_BAND_EDGES, np.asarray(aqi, dtype=float), side='left')
+
+def _lut_index(aqi, distance_ratio):
+    ratio = np.clip(np.asarray(distance_ratio, dtype=float), 0, 1)
+    step = np.rint(ratio * (COLOR_LUT_STEPS - 1)).astype(int)
+    return aqi_band(aqi), step
+
+def aqi_colors_rgba(aqi, distance_ratio):
+    """Vectorized lookup of RGBA colors (uint8) for arrays of AQI and distance ratios."""
+    return COLOR_LUT[_lut_index(aqi, distance_ratio)]
+
+def aqi_colors_hex(aqi, distance_ratio):
+    """Vectorized lookup of hex colors for arrays of AQI and distance ratios."""
+    return COLOR_LUT_HEX[_lut_index(aqi, distance_ratio)]
+
+def aqi_plotly_colorscale(max_aqi=400):
+    """Stepped Plotly colorscale over 0..max_aqi using the same band colors as the map."""
+    bounds = np.concatenate([[0], np.minimum(AQI_BAND_EDGES, max_aqi), [max_aqi]]) / max_aqi
+    colorscale = []
+    for band, hex_color in enumerate(COLOR_LUT_HEX[:, 0]):
+        if bounds[band] >= bounds[band + 1]:
+            continue
+        colorscale.append([float(bounds[band]), str(hex_color)])
+        colorscale.append([float(bounds[band + 1]), str(hex_color)])
+    return colorscale
+
 def interpolate_color(value, min_value, max_value, start_color, end_color):
     """Interpolate color between start_color and end_color based on a value."""
     ratio = (value - min_value) / (max_value - min_value)
     ratio = max(0, min(ratio, 1))  # Clamp between 0 and 1
     
-    def hex_to_rgb(hex_color):
-        return tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-    
-    def rgb_to_hex(rgb_color):
-        return '#' + ''.join(f'{int(c):02x}' for c in rgb_color)
-    
     start_rgb = hex_to_rgb(start_color)
     end_rgb = hex_to_rgb(end_color)
     
@@ -42,21 +160,7 @@ def interpolate_color(value, min_value, max_value, start_color, end_color):
 
 def get_air_quality_color_gradient(aqi, distance_ratio):
     """Return interpolated color based on AQI ranges and distance."""
-    green_color = '#00FF00'
-    if aqi <= 50:
-        start_color = '#00FF00'  # Green
-    elif aqi <= 100:
-        start_color = '#FFFF00'  # Yellow
-    elif aqi <= 150:
-        start_color = '#FFA500'  # Orange
-    elif aqi <= 200:
-        start_color = '#FF0000'  # Red
-    elif aqi <= 300:
-        start_color = '#800080'  # Purple
-    else:
-        start_color = '#A52A2A'  # Brown
-    
-    return interpolate_color(distance_ratio, 0, 1, start_color, green_color)
+    return str(aqi_colors_hex(aqi, distance_ratio))
 
 # def calculate_gaussian_plume(lat, lon, wind_speed, wind_direction,stack_height, stability_class='D', aqi=100, num_arcs=8):
 #     wind_rad = math.radians(wind_direction)
@@ -113,7 +217,7 @@ def calculate_gaussian_plume(power_plant_id, wind_speed, wind_direction, stabili
     plume_polygons = []
     arc_points = []
     cities = []
-    df = get_data(f"""
+    df = get_cached_data(f"""
         WITH cte AS (
     SELECT
         gs.ST_AsGeoJSON(gs.ST_SetSRID(geom, 4326)) AS geojson,
@@ -142,7 +246,7 @@ FROM cte, unnest(close_locations) AS location_id
 JOIN dwh.locations l ON l.id = location_id
 GROUP BY cte.geojson, aqi_value, arc_index
 ORDER BY aqi_value DESC;
-    """)
+    """, plant_id=power_plant_id)
     for _, row in df.iterrows():
         # Extract GeoJSON and convert it to coordinates
         arc_points = json.loads(row['geojson'])['coordinates'][0]
@@ -165,22 +269,21 @@ def add_gaussian_plume_to_map(plume_data, map_object):
     - plume_data (list of dict): Data with 'coordinates', 'aqi', and 'city' info for each plume.
     - map_object (folium.Map): Folium map object to which the polygons will be added.
     """
-    for data in plume_data:
-        arc_points = data['coordinates']  # Coordinates for this plume arc
-        aqi_value = data['aqi']  # AQI for this arc
-        city = data['city']  # City name
-        print(arc_points)
-        # Determine the AQI color for the plume arc
-        distance_ratio = plume_data.index(data) / len(plume_data)  # Estimate distance ratio
-        color = get_air_quality_color_gradient(aqi_value, distance_ratio)
+    if not plume_data:
+        return
+
+    aqi_values = np.array([data['aqi'] for data in plume_data], dtype=float)
+    distance_ratios = np.arange(len(plume_data)) / len(plume_data)  # Estimate distance ratio
+    colors = aqi_colors_hex(aqi_values, distance_ratios)
 
+    for data, color in zip(plume_data, colors):
         # Add the polygon to the map with a label showing the city and AQI
         folium.Polygon(
-            locations=arc_points,
-            color=color,
+            locations=data['coordinates'],
+            color=str(color),
             fill=True,
             fill_opacity=0.1,
-            fill_color=color
+            fill_color=str(color)
         ).add_to(map_object)
 
 # def add_gaussian_plume_to_map(plume_polygons, map_object):
@@ -193,8 +296,8 @@ def add_gaussian_plume_to_map(plume_data, map_object):
 #             fill_color=color,
 #         ).add_to(map_object)
 
-def fetch_missing_dates(query):
-    df = get_data(query)
+def fetch_missing_dates(query, plant_id=None):
+    df = get_cached_data(query, plant_id=plant_id)
     if df.empty:
         return df
     df['dateid'] = pd.to_datetime(df['dateid'], format='%Y%m%d')
@@ -1,15 +1,17 @@
 # index.py
 import streamlit as st
 from streamlit.elements.image import MAXIMUM_CONTENT_WIDTH
+from src.cache import query_cache
 
 # Configure pages
 analytics       = st.Page("pages/analytics.py", title="Data Analysis")
 map_view        = st.Page("pages/map_view.py", title="Map View")
+exposure        = st.Page("pages/exposure.py", title="Exposure")
 data_loader     = st.Page("pages/data_loader.py", title="Load Data")
 index           = st.Page("pages/index.py", title="Home",default=True )
 
 # Setup navigation
-navigation = st.navigation([index, analytics, map_view, data_loader])
+navigation = st.navigation([index, analytics, map_view, exposure, data_loader])
 
 # Page config
 st.set_page_config(
@@ -17,6 +19,11 @@ st.set_page_config(
     layout="wide",
 )
 
+# Query cache statistics
+with st.sidebar.expander("Query Cache"):
+    cache_stats = query_cache.stats()
+    st.write(f"Hits: {cache_stats['hits']} / Misses: {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})")
+    st.write(f"Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024 / 1024:.1f} MB)")
 
 # Run navigation system
 navigation.run()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from src import rolling_stats
+from src.rolling_stats import (RollingStats, get_rolling_stats, update_rolling_stats, ensure_rolling_stats,
+                               exceedance_alerts)
+
+def hourly_frame(start, end, **values):
+    index = pd.date_range(start, end, freq='h', inclusive='left')
+    return pd.DataFrame({name: np.full(len(index), value, dtype=float) for name, value in values.items()}, index=index)
+
+def test_out_of_order_months_fill_the_gap():
+    state = RollingStats()
+    for start, end in [('2023-01-01', '2023-02-01'), ('2023-03-01', '2023-04-01'), ('2023-02-01', '2023-03-01')]:
+        missing = state.missing_cells(hourly_frame(start, end, pm10=30))
+        state.extend(missing)
+
+    february = state.get('2023-02-01', '2023-02-28 23:00')
+    assert not february['pm10_mean_24h'].isna().any()
+    assert (february['pm10_mean_24h'] == 30).all()
+
+def test_pollutants_merge_after_weather_only_ingestion():
+    plant_id = 9999
+    ensure_rolling_stats(plant_id, hourly_frame('2023-05-01', '2023-05-02', temperature_2m=15))
+    update_rolling_stats(plant_id, hourly_frame('2023-05-01', '2023-05-02', temperature_2m=15, wind_speed_100m=20))
+
+    fetched = hourly_frame('2023-05-01', '2023-05-02', temperature_2m=15, wind_speed_100m=20, pm10=60)
+    state = ensure_rolling_stats(plant_id, fetched)
+
+    assert (state.values['pm10'] == 60).all()
+    assert exceedance_alerts(plant_id, '2023-05-01 23:00', '24h')['pm10'] == 24
+
+def test_exceedances_are_evaluated_at_the_given_hour():
+    state = RollingStats()
+    state.extend(pd.concat([hourly_frame('2021-01-01', '2021-01-02', pm10=60),
+                            hourly_frame('2021-01-02', '2021-01-03', pm10=10)]))
+
+    assert state.exceedances('2021-01-01 23:00')['pm10'] == 24
+    assert state.exceedances('2021-01-02 23:00')['pm10'] == 0
+    assert state.exceedances('2022-01-01 00:00').empty
+
+def test_states_are_bounded_and_ingestion_does_not_create_them(monkeypatch):
+    monkeypatch.setattr(rolling_stats, 'rolling_max_plants', 2)
+    monkeypatch.setattr(rolling_stats, '_states', rolling_stats.OrderedDict())
+
+    first = get_rolling_stats(1)
+    get_rolling_stats(2)
+    get_rolling_stats(1)
+    get_rolling_stats(3)
+    assert list(rolling_stats._states) == [1, 3]
+    assert get_rolling_stats(1) is first
+
+    update_rolling_stats(4, hourly_frame('2023-01-01', '2023-01-02', pm10=1))
+    assert 4 not in rolling_stats._states